@@ -0,0 +1,309 @@
+"""
+Scaling benchmark for resume ranking, ingestion and chart generation.
+
+Generates synthetic ResumeProfile-shaped corpora and replaces GeminiService with a deterministic
+local stub, so runs are reproducible, free and offline. For every corpus size and mode it reports
+throughput (resumes per second), p50/p95 latency and peak traced memory. Latency is per call for
+ingestion (one update_results) and search (one query), and per full run for ranking and charts.
+
+Run from the fastapi directory:
+
+    python -m benchmarks.ranking_benchmark --sizes 1000 10000 --latency-ms 50 --concurrency 8
+    python -m benchmarks.ranking_benchmark --sizes 100000 --modes cosine cosine_indexed search charts
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import time
+import tracemalloc
+from models.resume import ResumeProfile
+
+MODES = ["gemini", "gemini_batched", "cosine", "cosine_indexed", "search", "ingestion", "charts"]
+
+SKILLS = [
+    "Python", "Java", "JavaScript", "TypeScript", "React", "Node.js", "Express", "Django", "Flask",
+    "Spring", "SQL", "PostgreSQL", "MySQL", "MongoDB", "Redis", "Docker", "Kubernetes", "AWS", "Azure",
+    "GCP", "Terraform", "CI/CD", "Go", "Rust", "C++", "Pandas", "NumPy", "PyTorch", "TensorFlow",
+    "Spark", "Kafka", "GraphQL", "HTML", "CSS", "Next.js", "FastAPI", "Linux", "Git",
+]
+SOFT_SKILLS = ["Communication", "Leadership", "Teamwork", "Problem Solving", "Mentoring", "Ownership"]
+DEGREES = ["Bachelor of Technology in Computer Science", "Master of Science in Data Science",
+           "Bachelor of Engineering in Electronics", "Master of Computer Applications", "PhD in Machine Learning"]
+INSTITUTIONS = ["IIT Bombay", "MIT", "Stanford University", "University of Mumbai", "NIT Trichy", "ETH Zurich"]
+TITLES = ["Software Engineer", "Backend Developer", "Frontend Developer", "Data Scientist", "DevOps Engineer",
+          "ML Engineer", "Full Stack Developer"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+VERBS = ["Built", "Designed", "Optimized", "Migrated", "Maintained", "Automated", "Led development of"]
+OBJECTS = ["a payments service", "the data pipeline", "a recommendation engine", "internal dashboards",
+           "the CI/CD workflow", "a REST API", "a real-time chat system", "the search backend"]
+
+JOB_DESCRIPTION = (
+    "We are hiring a Backend Engineer with strong Python and FastAPI experience, solid SQL and PostgreSQL "
+    "skills, and hands-on Docker, Kubernetes and AWS knowledge. Experience building REST APIs and data "
+    "pipelines is a plus."
+)
+
+def generate_resume(rng, i):
+    """
+    One synthetic resume, validated against ResumeProfile
+    """
+    skills = rng.sample(SKILLS, rng.randint(4, 14))
+    profile = ResumeProfile(
+        contact_info={
+            "full_name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "location": rng.choice(["Mumbai, India", "Berlin, Germany", "Austin, USA"]),
+        },
+        education=[
+            {
+                "degree": rng.choice(DEGREES),
+                "institution": rng.choice(INSTITUTIONS),
+                "graduation_year": rng.randint(2005, 2024),
+            }
+            for _ in range(rng.randint(1, 2))
+        ],
+        work_experience=[
+            {
+                "company": rng.choice(COMPANIES),
+                "job_title": rng.choice(TITLES),
+                "start_date": f"{rng.randint(2010, 2022)}-01",
+                "responsibilities": [
+                    f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(skills)}"
+                    for _ in range(rng.randint(1, 4))
+                ],
+                "technologies": rng.sample(skills, min(3, len(skills))),
+            }
+            for _ in range(rng.randint(0, 4))
+        ],
+        skills={
+            "technical_skills": skills,
+            "soft_skills": rng.sample(SOFT_SKILLS, 2),
+        },
+        projects=[
+            {
+                "name": f"Project {i}-{p}",
+                "description": f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+                "technologies": rng.sample(skills, min(2, len(skills))),
+            }
+            for p in range(rng.randint(0, 3))
+        ],
+    )
+    return profile.model_dump()
+
+def generate_corpus(size, seed=0):
+    """
+    Dict of filename -> resume profile, deterministic for a given seed
+    """
+    rng = random.Random(seed)
+    return {f"resume_{i:06d}.pdf": generate_resume(rng, i) for i in range(size)}
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+        self.parsed = json.loads(text)
+
+class StubGeminiService:
+    """
+    Deterministic stand-in for GeminiService. Scores are derived from a hash of the prompt,
+    and every call waits latency_ms (plus optional jitter) to model the network round trip
+    """
+    def __init__(self, latency_ms=50.0, jitter_ms=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def _delay(self):
+        return (self.latency_ms + self.rng.uniform(0, self.jitter_ms)) / 1000
+
+    def _respond(self, contents):
+        self.calls += 1
+        prompt = contents[0] if isinstance(contents, list) else contents
+        filenames = re.findall(r"Resume \[(.*?)\]", prompt)
+        if filenames:
+            return StubResponse(json.dumps([self._match(filename, filename) for filename in filenames]))
+        return StubResponse(json.dumps(self._match(None, prompt)))
+
+    def _match(self, filename, seed_text):
+        digest = hashlib.sha256(seed_text.encode("utf-8")).digest()
+        match_data = {
+            "match_percentage": round(digest[0] / 255 * 100, 1),
+            "matching_skills": [],
+            "gaps": [],
+            "reasoning": "stub",
+        }
+        if filename is not None:
+            match_data["filename"] = filename
+        return match_data
+
+    def generate_content(self, contents, model=None, config=None, deadline=None):
+        time.sleep(self._delay())
+        return self._respond(contents)
+
+    async def generate_content_async(self, contents, model=None, config=None, deadline=None):
+        await asyncio.sleep(self._delay())
+        return self._respond(contents)
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def measure(run, repeats):
+    """
+    Run once under tracemalloc for peak memory (this also warms up), then time `repeats` untraced runs.
+    run() returns the list of per-operation latencies in seconds it observed, or None for a single op
+    """
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations, operation_latencies = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        latencies = run()
+        elapsed = time.perf_counter() - started
+        durations.append(elapsed)
+        operation_latencies.extend(latencies if latencies is not None else [elapsed])
+    return durations, operation_latencies, peak
+
+def benchmark_mode(mode, corpus, workdir, args):
+    """
+    Returns (durations, operation latencies, peak memory bytes, items processed per run)
+    """
+    from services.match_cache import MatchResultCache
+    from services.ranking_service import ResumeRankingService
+    from services.resume_index import get_resume_index
+    from services.resume_store import get_resume_store
+
+    stub = StubGeminiService(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    ranking_service = ResumeRankingService(max_concurrency=args.concurrency, genai_client=stub)
+    results_file = os.path.join(workdir, "resume_analysis_results.json")
+
+    def fresh_cache():
+        # A cold cache on every run so each run really calls the stub
+        cache_file = os.path.join(workdir, "match_cache.json")
+        if os.path.exists(cache_file):
+            os.remove(cache_file)
+        ranking_service.match_cache = MatchResultCache(cache_file=cache_file)
+
+    if mode == "gemini":
+        def run():
+            fresh_cache()
+            asyncio.run(ranking_service.rank_resumes_with_gemini(JOB_DESCRIPTION, corpus))
+        return measure(run, args.repeats) + (len(corpus),)
+
+    if mode == "gemini_batched":
+        def run():
+            fresh_cache()
+            asyncio.run(ranking_service.rank_resumes_with_gemini_batched(JOB_DESCRIPTION, corpus))
+        return measure(run, args.repeats) + (len(corpus),)
+
+    if mode == "cosine":
+        def run():
+            ranking_service.rank_resumes_with_cosine_similarity(JOB_DESCRIPTION, corpus)
+        return measure(run, args.repeats) + (len(corpus),)
+
+    get_resume_store(results_file).replace_all(corpus)
+
+    if mode == "cosine_indexed":
+        index = get_resume_index(results_file)
+        def run():
+            ranking_service.rank_resumes_with_cosine_similarity(JOB_DESCRIPTION, corpus, index=index)
+        return measure(run, args.repeats) + (len(corpus),)
+
+    if mode == "search":
+        from services.semantic_index import get_semantic_index
+        index = get_semantic_index(results_file)
+        def run():
+            return [timed(lambda: index.search(JOB_DESCRIPTION, top_k=10)) for _ in range(args.queries)]
+        return measure(run, args.repeats) + (args.queries,)
+
+    if mode == "ingestion":
+        from services.resume_service import ResumeService
+        new_resumes = generate_corpus(args.ingest, seed=args.seed + 1)
+        def run():
+            service = ResumeService(results_file)
+            service.store.replace_all(corpus)
+            return [
+                timed(lambda: service.update_results(f"new_{filename}", resume_data))
+                for filename, resume_data in new_resumes.items()
+            ]
+        return measure(run, args.repeats) + (len(new_resumes),)
+
+    if mode == "charts":
+        from routes import analytics
+        from services.resume_service import ResumeService
+        from starlette.requests import Request
+        analytics.service = ResumeService(results_file)
+        def run():
+            # No If-None-Match, so every run recomputes the chart
+            asyncio.run(analytics.generate_chart_data(Request({"type": "http", "headers": []})))
+        return measure(run, args.repeats) + (len(corpus),)
+
+    raise ValueError(f"Unknown mode: {mode}")
+
+def timed(operation):
+    started = time.perf_counter()
+    operation()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark resume ranking, ingestion and chart generation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="Corpus sizes to benchmark")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per mode and size")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub Gemini latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random stub latency per call")
+    parser.add_argument("--concurrency", type=int, default=8, help="Gemini ranking concurrency")
+    parser.add_argument("--ingest", type=int, default=200, help="Resumes added per ingestion run")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per search run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark-stub")
+    results = []
+    print(f"{'mode':<16}{'size':>9}{'items/s':>12}{'p50 ms':>12}{'p95 ms':>12}{'peak MiB':>11}")
+
+    for size in args.sizes:
+        corpus = generate_corpus(size, seed=args.seed)
+        for mode in args.modes:
+            workdir = tempfile.mkdtemp(prefix="resume_benchmark_")
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                durations, latencies, peak, items = benchmark_mode(mode, corpus, workdir, args)
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(workdir, ignore_errors=True)
+
+            result = {
+                "mode": mode,
+                "size": size,
+                "throughput_per_s": items * len(durations) / sum(durations),
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "peak_memory_mib": peak / (1024 * 1024),
+            }
+            results.append(result)
+            print(f"{mode:<16}{size:>9}{result['throughput_per_s']:>12.1f}{result['p50_ms']:>12.2f}"
+                  f"{result['p95_ms']:>12.2f}{result['peak_memory_mib']:>11.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,104 @@
 ENABLE_COMPRESSION_AND_NLTK = True
 
 EXCLUDED_DIRS = ["dist", "node_modules", ".git", "__pycache__"] 
-CHAT_HISTORY_FILE = "chat_history.json"
\ No newline at end of file
+CHAT_HISTORY_FILE = "chat_history.json"
+
+# Maximum number of Gemini scoring requests in flight while ranking resumes
+GEMINI_RANKING_CONCURRENCY = 8
+
+# Batched ranking: token budget per Gemini prompt and the cap on resumes packed into one prompt
+GEMINI_BATCH_TOKEN_BUDGET = 24000
+GEMINI_BATCH_MAX_RESUMES = 25
+
+# Cache of Gemini match results, keyed by job description and resume content
+MATCH_CACHE_FILE = "match_cache.json"
+MATCH_CACHE_MAX_ENTRIES = 20000
+MATCH_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Streaming ranking: seconds between partial leaderboards and how many entries each one holds
+RANKING_LEADERBOARD_INTERVAL_SECONDS = 2.0
+RANKING_LEADERBOARD_SIZE = 10
+
+# Semantic search: LSA embedding size, corpus size from which the ANN index is used,
+# inverted lists probed per query, and share of changed resumes that triggers an SVD refit
+SEMANTIC_INDEX_DIMENSIONS = 128
+SEMANTIC_ANN_MIN_RESUMES = 5000
+SEMANTIC_ANN_PROBES = 8
+SEMANTIC_REFIT_FRACTION = 0.2
+
+# Number of resumes analyzed in parallel per /resume/multi-upload connection
+RESUME_EXTRACTION_CONCURRENCY = 4
+
+# Index from uploaded resume content hash (sha256) to its extracted profile
+RESUME_HASH_INDEX_FILE = "resume_hash_index.json"
+
+# Extract resume text locally with PyPDF2 and send only the text to Gemini; PDFs yielding fewer
+# characters per page than this (scanned or image-only resumes) are uploaded as files instead
+RESUME_LOCAL_TEXT_EXTRACTION = True
+RESUME_LOCAL_TEXT_MIN_CHARS_PER_PAGE = 100
+
+# Storage backend for resume analysis results: "sqlite" (one row per resume, WAL mode) or "json" (single file)
+RESUME_STORE_BACKEND = "sqlite"
+
+# Background resume extraction jobs: SQLite queue file and number of concurrent extraction workers
+RESUME_JOB_DB_FILE = "resume_jobs.db"
+RESUME_JOB_WORKERS = 4
+
+# Upload streaming limits: largest accepted file, total bytes per connection or request,
+# read size for multipart uploads and chunks buffered between receiving and writing to disk
+UPLOAD_MAX_FILE_BYTES = 20 * 1024 * 1024
+UPLOAD_MAX_CONNECTION_BYTES = 1024 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_QUEUE_CHUNKS = 8
+# Room for multipart boundaries and part headers when a request body is checked against a file size limit
+UPLOAD_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+# Cache-Control for polled JSON endpoints that carry an ETag: clients may keep a copy but must revalidate
+HTTP_CACHE_CONTROL = "private, no-cache"
+
+# Skill taxonomy: file holding learned skills and fuzzy-matched aliases, and the difflib similarity
+# (0..1) a new skill name needs to be mapped onto an existing canonical skill
+SKILL_TAXONOMY_FILE = "skill_taxonomy.json"
+SKILL_FUZZY_MATCH_CUTOFF = 0.88
+
+# Manifest of uploaded_resumes/ files (mtime, size, sha256) already reconciled into the results
+RESUME_MANIFEST_FILE = "resume_manifest.json"
+
+# Gemini response cache: SQLite file on local disk and its size cap (least recently used entries are evicted
+# beyond it). Caching is opt-in per call site through a TTL; GEMINI_CACHE_ENABLED switches it off everywhere
+GEMINI_CACHE_ENABLED = True
+GEMINI_CACHE_FILE = "gemini_response_cache.db"
+GEMINI_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Per-call-site Gemini response cache TTLs in seconds
+GEMINI_CACHE_TTL_PROJECT_ANALYSIS = 24 * 60 * 60
+GEMINI_CACHE_TTL_BIAS_ANALYSIS = 6 * 60 * 60
+GEMINI_CACHE_TTL_EMAIL = 7 * 24 * 60 * 60
+
+# Gemini call policy: overall deadline per call (seconds, covering all retries) and a shorter one for
+# per-resume ranking calls, which have a local cosine fallback; uploads get their own deadline
+GEMINI_CALL_DEADLINE_SECONDS = 60
+GEMINI_RANKING_DEADLINE_SECONDS = 20
+GEMINI_UPLOAD_DEADLINE_SECONDS = 120
+
+# Retries of rate-limited, 5xx and timed-out Gemini calls: attempts per call and the full-jitter
+# exponential backoff range in seconds
+GEMINI_RETRY_MAX_ATTEMPTS = 4
+GEMINI_RETRY_BASE_DELAY_SECONDS = 0.5
+GEMINI_RETRY_MAX_DELAY_SECONDS = 8
+
+# Circuit breaker: consecutive calls that failed after all retries (rate limits excluded) that open it, and seconds before a single probe call
+# is let through again. While open, Gemini calls fail immediately with CircuitOpenError
+GEMINI_BREAKER_FAILURE_THRESHOLD = 5
+GEMINI_BREAKER_RESET_SECONDS = 30
+
+# Gemini uploaded-file handles: index of content hash -> remote file, the margin (seconds) before a handle's
+# expiry after which it is no longer reused, and how often stale remote files are deleted in the background
+GEMINI_FILE_CACHE_FILE = "gemini_file_handles.json"
+GEMINI_FILE_REUSE_MARGIN_SECONDS = 30 * 60
+GEMINI_FILE_PRUNE_INTERVAL_SECONDS = 60 * 60
+
+# Prompt token budgets (cl100k tokens, a close proxy for Gemini's tokenizer). Larger prompts are compacted:
+# low-value fields and files are dropped first, then text is compressed, then truncated by priority
+PROJECT_ANALYSIS_TOKEN_BUDGET = 200000
+BIAS_ANALYSIS_TOKEN_BUDGET = 60000
@@ -0,0 +1,80 @@
+from starlette.responses import JSONResponse
+from config.settings import UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_CONNECTION_BYTES, UPLOAD_MULTIPART_OVERHEAD_BYTES
+
+class UploadLimitMiddleware:
+    """
+    Rejects request bodies over a per-path byte limit before the route sees them.
+
+    FastAPI parses multipart forms (spooling UploadFiles to disk) before the route or any dependency
+    runs, so the limits UploadStream enforces while copying come too late for HTTP uploads. Requests
+    declaring a larger Content-Length get a 413 without their body being read; chunked bodies are
+    counted as they are received, cut off once they pass the limit and answered with a 413 as well.
+    """
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            await self._reject(scope, receive, send, max_bytes)
+            return
+
+        received_bytes = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received_bytes, too_large
+            if too_large:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received_bytes += len(message.get("body", b""))
+                if received_bytes > max_bytes:
+                    # Stop reading; whatever the app answers to the cut-off body is replaced with a 413
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message):
+            nonlocal response_started
+            if too_large:
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await self._reject(scope, receive, send, max_bytes)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, limited_send)
+        except Exception:
+            if not too_large or response_started:
+                raise
+            await self._reject(scope, receive, send, max_bytes)
+
+    async def _reject(self, scope, receive, send, max_bytes):
+        response = JSONResponse({"detail": f"Upload exceeds the {max_bytes} byte request limit"}, status_code=413)
+        await response(scope, receive, send)
+
+def setup_upload_limits(app):
+    """
+    Applies request size limits to the HTTP upload endpoints.
+    """
+    app.add_middleware(
+        UploadLimitMiddleware,
+        limits={
+            # One file per request
+            "/api/v1/project/process_upload/": UPLOAD_MAX_FILE_BYTES + UPLOAD_MULTIPART_OVERHEAD_BYTES,
+            # Many files per request; each is still held to UPLOAD_MAX_FILE_BYTES while it is copied
+            "/api/v1/jobs/resume-extraction": UPLOAD_MAX_CONNECTION_BYTES,
+        },
+    )
@@ -8,6 +8,10 @@ class BiasAnalysisRequest(BaseModel):
         default=["gender", "age", "ethnicity", "education", "experience"],
         description="Types of biases to analyze"
     )
+    refresh: bool = Field(
+        default=False,
+        description="Skip the cached analysis for an unchanged pool and ask Gemini again"
+    )
 
     class Config:
         extra = "allow"
\ No newline at end of file
@@ -1,9 +1,33 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 class JobDescriptionRequest(BaseModel):
     job_description: str
     resumes_file: str = "resume_analysis_results.json"
+    batched: bool = Field(False, description="Score several resumes per Gemini request")
+    retrieve_top_k: Optional[int] = Field(None, gt=0, description="Rerank only the top K resumes retrieved by TF-IDF with Gemini")
+    min_retrieval_score: float = Field(0.0, ge=0.0, le=1.0, description="Minimum TF-IDF score for a resume to reach the Gemini rerank")
+
+class BulkJobMatchRequest(BaseModel):
+    job_descriptions: List[str] = Field(..., min_length=1, description="Job descriptions to match in one pass")
+    resumes_file: str = "resume_analysis_results.json"
+    top_k: int = Field(10, gt=0, description="Number of best resumes returned per job")
+    include_matrix: bool = Field(True, description="Also return the full jobs x resumes score matrix")
+
+class SemanticSearchRequest(BaseModel):
+    query: str = Field(..., description="Job description or free-text description of the wanted candidate")
+    top_k: int = Field(10, gt=0, le=200, description="Number of candidates to return")
+
+class FacetTerm(BaseModel):
+    field: Literal["skill", "technology", "degree_type", "institution"] = Field(..., description="Indexed field to match")
+    value: str = Field(..., description="Value to match (case-insensitive)")
+
+class CandidateFilterRequest(BaseModel):
+    all_of: List[FacetTerm] = Field(default_factory=list, description="Every term must match (AND)")
+    any_of: List[FacetTerm] = Field(default_factory=list, description="At least one term must match (OR)")
+    none_of: List[FacetTerm] = Field(default_factory=list, description="No term may match (NOT)")
+    offset: int = Field(0, ge=0, description="Number of matches to skip")
+    limit: int = Field(20, gt=0, le=500, description="Maximum number of matches to return")
 
 class ContactInfo(BaseModel):
     full_name: str = Field(..., description="Full name of the candidate")
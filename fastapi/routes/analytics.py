@@ -1,27 +1,49 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 from services.resume_service import ResumeService
+from services.skill_taxonomy import get_canonical_skills, get_skill_taxonomy
+from utils.http_cache import make_etag, not_modified, cache_headers
 import json
 
 router = APIRouter()
 service = ResumeService()
 
+CHART_CATEGORIES = ["Frontend", "Backend", "DevOps", "Database"]
+
+def category_distribution(frequency, taxonomy):
+    """
+    Number of distinct canonical skills per dashboard category
+    """
+    counts = {category: 0 for category in CHART_CATEGORIES}
+    for skill_id in frequency:
+        category = taxonomy.category(skill_id)
+        if category in counts:
+            counts[category] += 1
+    return [{"name": category, "value": count} for category, count in counts.items()]
+
 @router.get("/generate-chart-data")
-async def generate_chart_data():
+async def generate_chart_data(request: Request):
     """
     Generate aggregated chart data from all resumes and save to chart.json
+    The chart data only depends on the stored results, so polls with a matching ETag get a 304
+    without recomputing it
     """
     try:
-        service.load_results()
+        etag = make_etag(service.store.signature())
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        total_resumes = service.store.count()
         
-        if not service.analysis_results:
+        if not total_resumes:
             return JSONResponse(
                 status_code=404,
                 content={"message": "No resume data available for analysis"}
             )
         
         chart_data = {
-            "total_resumes": len(service.analysis_results),
+            "total_resumes": total_resumes,
             "total_skills": set(),
             "total_projects": 0,
             "skill_frequency": {},
@@ -38,7 +60,7 @@ async def generate_chart_data():
             "resumes": []
         }
         
-        for filename, resume in service.analysis_results.items():
+        for filename, resume in service.iter_results():
             try:
                 if resume is None:
                     print(f"Warning: Skipping resume '{filename}' because its data is None.")
@@ -90,15 +112,15 @@ async def generate_chart_data():
                         "year": edu.get("graduation_year", "N/A")
                     })
 
-                for skill in technical_skills:
-                    chart_data["total_skills"].add(skill)
-                    chart_data["skill_frequency"][skill] = chart_data["skill_frequency"].get(skill, 0) + 1
+                # Counted by canonical skill ID, so spelling variants of one skill are counted together
+                canonical_skills = get_canonical_skills(resume)
+                for skill in canonical_skills["skills"]:
+                    chart_data["total_skills"].add(skill["id"])
+                    chart_data["skill_frequency"][skill["id"]] = chart_data["skill_frequency"].get(skill["id"], 0) + 1
 
                 chart_data["total_projects"] += len(projects_list)
-                if projects_list:
-                    for project in projects_list:
-                        for tech in project.get("technologies", []): # Safely handle missing technologies
-                            chart_data["common_technologies"][tech] = chart_data["common_technologies"].get(tech, 0) + 1
+                for tech in canonical_skills["technologies"]:
+                    chart_data["common_technologies"][tech["id"]] = chart_data["common_technologies"].get(tech["id"], 0) + 1
 
                 chart_data["resumes"].append(resume_info)
 
@@ -106,6 +128,7 @@ async def generate_chart_data():
                 print(f"Error processing resume '{filename}': {e}")
 
         chart_data["total_skills"] = len(chart_data["total_skills"])
+        taxonomy = get_skill_taxonomy()
         
         top_skills = sorted(
             chart_data["skill_frequency"].items(),
@@ -126,29 +149,8 @@ async def generate_chart_data():
                 "total_projects": chart_data["total_projects"]
             },
             "skills_data": {
-                "top_skills": [{"name": skill, "count": count} for skill, count in top_skills],
-                "skill_distribution": [
-                    {
-                        "name": "Frontend",
-                        "value": sum(1 for skill in chart_data["skill_frequency"] 
-                                     if any(tech in skill.lower() for tech in ["html", "css", "javascript", "react"]))
-                    },
-                    {
-                        "name": "Backend",
-                        "value": sum(1 for skill in chart_data["skill_frequency"] 
-                                     if any(tech in skill.lower() for tech in ["node", "express", "python", "java", "spring"]))
-                    },
-                    {
-                        "name": "DevOps",
-                        "value": sum(1 for skill in chart_data["skill_frequency"] 
-                                     if any(tech in skill.lower() for tech in ["docker", "kubernetes", "aws", "azure", "ci/cd"]))
-                    },
-                    {
-                        "name": "Database",
-                        "value": sum(1 for skill in chart_data["skill_frequency"] 
-                                     if any(tech in skill.lower() for tech in ["sql", "mysql", "postgres", "mongodb", "redis"]))
-                    }
-                ]
+                "top_skills": [{"name": taxonomy.name(skill), "count": count} for skill, count in top_skills],
+                "skill_distribution": category_distribution(chart_data["skill_frequency"], taxonomy)
             },
             "experience_data": [
                 {"name": level, "value": count} 
@@ -159,29 +161,8 @@ async def generate_chart_data():
                 for degree, count in chart_data["degree_types"].items()
             ],
             "technology_data": {
-                "top_technologies": [{"name": tech, "count": count} for tech, count in top_tech],
-                "technology_distribution": [
-                    {
-                        "name": "Frontend",
-                        "value": sum(1 for tech in chart_data["common_technologies"] 
-                                     if any(t in tech.lower() for t in ["html", "css", "javascript", "react"]))
-                    },
-                    {
-                        "name": "Backend",
-                        "value": sum(1 for tech in chart_data["common_technologies"] 
-                                     if any(t in tech.lower() for t in ["node", "express", "python", "java"]))
-                    },
-                    {
-                        "name": "DevOps",
-                        "value": sum(1 for tech in chart_data["common_technologies"] 
-                                     if any(t in tech.lower() for t in ["docker", "kubernetes", "aws"]))
-                    },
-                    {
-                        "name": "Database",
-                        "value": sum(1 for tech in chart_data["common_technologies"] 
-                                     if any(t in tech.lower() for t in ["sql", "mysql", "mongodb"]))
-                    }
-                ]
+                "top_technologies": [{"name": taxonomy.name(tech), "count": count} for tech, count in top_tech],
+                "technology_distribution": category_distribution(chart_data["common_technologies"], taxonomy)
             },
             "resume_comparison": chart_data["resumes"]
         }
@@ -194,7 +175,8 @@ async def generate_chart_data():
         content={
             "message": "Chart data generated successfully",
             "chart_data": final_chart_data
-        }
+        },
+        headers=cache_headers(etag)
     )
 
     except Exception as e:
@@ -2,16 +2,36 @@ from fastapi.routing import APIRouter
 from models.bias import BiasAnalysisRequest
 from fastapi import HTTPException
 import json
-from services.gemini_service import GeminiService
+from services.gemini_service import get_gemini_service
+from services.gemini_policy import GeminiUnavailableError
 from utils.response import clean_json_response
+from services.token_budget import TokenBudget, PromptSection, drop_fields, token_usage
+from config.settings import GEMINI_CACHE_TTL_BIAS_ANALYSIS, BIAS_ANALYSIS_TOKEN_BUDGET
 import os
 
 router = APIRouter()
 
+# Profile fields that say little about selection bias, dropped first when the pool is over the token budget
+BIAS_LOW_VALUE_FIELDS = [
+    "canonical_skills",
+    "contact_info.email",
+    "contact_info.phone",
+    "contact_info.linkedin",
+    "contact_info.github",
+    "contact_info.website",
+    "projects",
+    "achievements",
+    "skills.soft_skills",
+    "work_experience.responsibilities",
+    "work_experience.technologies",
+]
+
 @router.post("/bias-analysis")
 async def analyze_bias(request: BiasAnalysisRequest):
     """
     Endpoint to analyze potential biases in the selection process using Gemini
+    Profiles over BIAS_ANALYSIS_TOKEN_BUDGET are compacted (low-value fields, then compression, then
+    whole profiles are left out); the result carries the token usage
     """
     try:
         selected_file = "selected_personnel.json"
@@ -87,19 +107,34 @@ async def analyze_bias(request: BiasAnalysisRequest):
         """
         
         analysis_content = {
-            "profiles": selected_profiles,
             "selection_metadata": selection_metadata,
             "job_title": request.job_title,
             "job_description": request.job_description,
             "analysis_types": request.analysis_types
         }
+        # Same text as json.dumps({"profiles": selected_profiles, **analysis_content}), with each profile
+        # as its own section so profiles can be compacted or left out whole
+        data_head = prompt + "\n\nAnalysis Data: " + '{"profiles": ['
+        data_tail = '], ' + json.dumps(analysis_content)[1:]
+        profile_sections = [
+            PromptSection(
+                f"profile {i}",
+                json.dumps(profile),
+                lean_text=json.dumps(drop_fields(profile, BIAS_LOW_VALUE_FIELDS)),
+                atomic=True
+            )
+            for i, profile in enumerate(selected_profiles)
+        ]
+        contents, budget_report = TokenBudget(BIAS_ANALYSIS_TOKEN_BUDGET).fit(
+            profile_sections, head=data_head, tail=data_tail, separator=", "
+        )
 
-        gemini = GeminiService()
-        
-        response = gemini.generate_content(
+        response = await get_gemini_service().generate_content_async(
             model="gemini-2.0-flash",
-            contents=prompt + "\n\nAnalysis Data: " + json.dumps(analysis_content),
-            config={'response_mime_type': 'application/json'}
+            contents=contents,
+            config={'response_mime_type': 'application/json'},
+            cache_ttl=GEMINI_CACHE_TTL_BIAS_ANALYSIS,
+            bypass_cache=request.refresh
         )
 
         if not response or not response.text:
@@ -109,7 +144,11 @@ async def analyze_bias(request: BiasAnalysisRequest):
             )
         
         bias_analysis = clean_json_response(response.text)
+        if isinstance(bias_analysis, dict):
+            bias_analysis["token_usage"] = token_usage(response, budget_report)
         return bias_analysis
         
+    except GeminiUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"Bias analysis is temporarily unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing bias: {str(e)}")
\ No newline at end of file
@@ -1,6 +1,10 @@
+from fastapi import Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRouter
 from models.chat import ChatHistoryPayload, ChatHistoryItem
 from services.chat_service import ChatService
+from utils.file_stat import file_signature
+from utils.http_cache import make_etag, not_modified, cache_headers
 
 router = APIRouter()
 service = ChatService()
@@ -24,9 +28,15 @@ async def update_chat_history(payload: ChatHistoryPayload):
     return {"message": "Chat history updated successfully"}
 
 @router.get("/get_chat_history")
-async def get_chat_history():
+async def get_chat_history(request: Request):
     """
     Retrieves chat history.
+    Unchanged history is answered with a 304 when the client sends the last ETag.
     """
+    etag = make_etag(file_signature(service.CHAT_HISTORY_FILE))
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+
     chat_history = service.load_chat_history()
-    return chat_history
\ No newline at end of file
+    return JSONResponse(content=chat_history, headers=cache_headers(etag))
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi.routing import APIRouter
 from fastapi import HTTPException, Body, Request
 from services.email_service import EmailGenerator
 from models.email import SendIndividualEmailRequest, SendBulkEmailRequest
+import asyncio
 import os
 
 router = APIRouter()
@@ -30,7 +31,9 @@ async def send_individual_email(payload: SendIndividualEmailRequest):
         # Initialize email generator
         email_gen = EmailGenerator()
 
-        success = email_gen.send_assignment_email(
+        # Generating (Gemini, with retry backoff) and sending (SMTP) both block, so run them off the event loop
+        success = await asyncio.to_thread(
+            email_gen.send_assignment_email,
             sender_email=sender_email,
             receiver_email=candidate_profile["contact_info"]["email"],
             password=password,
@@ -76,7 +79,8 @@ async def send_bulk_emails(payload: SendBulkEmailRequest):
                 }
                 continue
 
-            success = email_gen.send_assignment_email(
+            success = await asyncio.to_thread(
+                email_gen.send_assignment_email,
                 sender_email=sender_email,
                 receiver_email=candidate_profile["contact_info"]["email"],
                 password=password,
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException
+from services.gemini_service import get_gemini_service
+
+router = APIRouter()
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    Hit, miss and eviction counters and current size of the Gemini response cache
+    """
+    cache = get_gemini_service().response_cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Gemini response cache is disabled")
+    return cache.get_stats()
+
+@router.get("/policy-stats")
+async def get_policy_stats():
+    """
+    Call, retry and failure counters of the Gemini call policy and the circuit breaker state
+    """
+    return get_gemini_service().policy.get_stats()
+
+@router.get("/file-stats")
+async def get_file_stats():
+    """
+    Reused and uploaded file counts of the Gemini file handle cache, and remote files awaiting deletion
+    """
+    return get_gemini_service().file_cache.get_stats()
+
+@router.delete("/cache")
+async def clear_cache():
+    """
+    Drop every cached Gemini response
+    """
+    cache = get_gemini_service().response_cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Gemini response cache is disabled")
+    cache.clear()
+    return {"message": "Gemini response cache cleared"}
@@ -1,7 +1,8 @@
 from fastapi.routing import APIRouter
 from services.chat_service import ChatService
 from utils.response import clean_json_response
-from services.gemini_service import GeminiService
+from services.gemini_service import get_gemini_service
+from services.gemini_policy import GeminiUnavailableError
 
 router = APIRouter()
 service = ChatService()
@@ -44,8 +45,7 @@ async def analyze_interview(history_uid: str|None = None):
     """
         
     try:
-        gemini = GeminiService()
-        response = gemini.generate_content(
+        response = await get_gemini_service().generate_content_async(
             model="gemini-2.0-flash",
             contents=prompt,
         )
@@ -55,5 +55,7 @@ async def analyze_interview(history_uid: str|None = None):
 
         interview_results = clean_json_response(response.text)
         return interview_results
+    except GeminiUnavailableError as e:
+        return {"status": 503, "response": f"Interview analysis is temporarily unavailable: {str(e)}"}
     except Exception as e:
         return {"status": 500, "response": f"Error analyzing interview: {str(e)}"}
\ No newline at end of file
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File
+from typing import List
+from services.file_service import FileUploadService
+from services.upload_stream import UploadStream, UploadTooLargeError, upload_file_chunks
+from services.job_queue import get_job_queue
+
+router = APIRouter()
+
+@router.post("/resume-extraction")
+async def submit_resume_extraction_job(files: List[UploadFile] = File(...)):
+    """
+    Save the uploaded resumes and queue them for background extraction.
+    Returns immediately with a job ID to poll; results land in the resume analysis results
+    """
+    file_handler = FileUploadService()
+    upload_stream = UploadStream()
+    queued_files = []
+    try:
+        for file in files:
+            destination_path, safe_filename = await file_handler.save_uploaded_file(file.filename)
+            content_hash = await file_handler.write_file(
+                destination_path, upload_file_chunks(file), upload_stream=upload_stream
+            )
+            queued_files.append((safe_filename, destination_path, content_hash))
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    job_queue = get_job_queue()
+    job_id = job_queue.submit(queued_files)
+    return {"job_id": job_id, "status": "queued", "total": len(queued_files)}
+
+@router.get("/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Job status with per-file progress
+    """
+    status = get_job_queue().status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+@router.get("/{job_id}/results")
+async def get_job_results(job_id: str):
+    """
+    Results of the files the job has finished so far, including failed ones
+    """
+    job_queue = get_job_queue()
+    status = job_queue.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job_id,
+        "status": status["status"],
+        "total": status["total"],
+        "results": job_queue.results(job_id)
+    }
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Cancel a job: queued files are dropped and files being extracted are interrupted
+    """
+    job_queue = get_job_queue()
+    if not job_queue.cancel(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_queue.status(job_id)
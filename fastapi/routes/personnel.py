@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 import json
+from utils.file_stat import file_signature
+from utils.http_cache import make_etag, not_modified, cache_headers
 from models.resume import SelectedPersonnel
 
 router = APIRouter()
@@ -28,19 +31,24 @@ async def upload_selected_personnel(personnel: SelectedPersonnel):
         raise HTTPException(status_code=500, detail=f"Error uploading selected personnel: {str(e)}")
 
 @router.get("/selected-personnel")
-async def get_selected_personnel():
+async def get_selected_personnel(request: Request):
     """
     Endpoint to retrieve all selected personnel
     """
     try:
         selected_file = "selected_personnel.json"
+        etag = make_etag(file_signature(selected_file))
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
         try:
             with open(selected_file, 'r') as f:
                 selected_personnel = json.load(f)
         except FileNotFoundError:
             selected_personnel = {}
         
-        return selected_personnel
+        return JSONResponse(content=selected_personnel, headers=cache_headers(etag))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving selected personnel: {str(e)}")
\ No newline at end of file
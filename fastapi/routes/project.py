@@ -2,13 +2,47 @@ from fastapi.routing import APIRouter
 from fastapi import HTTPException, Body, Response, UploadFile, File
 from utils.response import clean_json_response
 from services.onefilellm import process_github_issue, process_github_repo,process_github_pull_request, process_arxiv_pdf, process_doi_or_pmid, crawl_and_extract_text, preprocess_text, fetch_youtube_transcript, process_local_folder
-from services.gemini_service import GeminiService
+from services.gemini_service import get_gemini_service
+from services.gemini_policy import GeminiUnavailableError
+from services.upload_stream import UploadStream, UploadTooLargeError, upload_file_chunks
 from urllib.parse import urlparse
-from config.settings import ENABLE_COMPRESSION_AND_NLTK
+from services.token_budget import TokenBudget, PromptSection, token_usage
+from config.settings import ENABLE_COMPRESSION_AND_NLTK, GEMINI_CACHE_TTL_PROJECT_ANALYSIS, PROJECT_ANALYSIS_TOKEN_BUDGET
 import os
+import re
+import tempfile
 
 router = APIRouter()
 
+# Per-file headers written by onefilellm, used to split the project content into prompt sections
+PROJECT_FILE_HEADER = re.compile(r"^# --- (?:GitHub File|Local File|Web Page): (.+?) ---[ \t]*$", re.MULTILINE)
+
+# Source files are kept longest when the project content is over budget; low-value files (data, lock files) go first
+PROJECT_CODE_EXTENSIONS = ('.py', '.go', '.proto', '.cjs', '.h', '.ipynb')
+PROJECT_LOW_VALUE_EXTENSIONS = ('.json', '.lock')
+
+def project_prompt_sections(project_content):
+    """
+    Split onefilellm output into one PromptSection per file, prioritized by file type
+    """
+    headers = list(PROJECT_FILE_HEADER.finditer(project_content))
+    if not headers:
+        return [PromptSection("content", project_content)]
+
+    sections = []
+    if project_content[:headers[0].start()].strip():
+        sections.append(PromptSection("source", project_content[:headers[0].start()], priority=3, required=True))
+    for header, next_header in zip(headers, headers[1:] + [None]):
+        name = header.group(1)
+        text = project_content[header.start():next_header.start() if next_header else len(project_content)]
+        if name.endswith(PROJECT_CODE_EXTENSIONS):
+            sections.append(PromptSection(name, text, priority=2))
+        elif name.endswith(PROJECT_LOW_VALUE_EXTENSIONS):
+            sections.append(PromptSection(name, text, priority=0, lean_text=""))
+        else:
+            sections.append(PromptSection(name, text, priority=1))
+    return sections
+
 def main_processing(input_path):
     output_file = "uncompressed_output.txt"
     processed_file = "compressed_output.txt"
@@ -68,9 +102,11 @@ async def process_url_or_path(input_path: str = Body(embed=True), compressed: bo
         raise HTTPException(status_code=500, detail=str(e))
     
 @router.post("/analyze_project/")
-async def analyze_project(input_path: str = Body(embed=True)):
+async def analyze_project(input_path: str = Body(embed=True), refresh: bool = Body(False, embed=True)):
     """
     Endpoint to analyze a project based on its code or documentation using Gemini.
+    Analyses of unchanged content are served from the Gemini response cache unless refresh is set.
+    Content over PROJECT_ANALYSIS_TOKEN_BUDGET is compacted first; the result carries the token usage.
     """
     try:
         result = main_processing(input_path)
@@ -83,7 +119,7 @@ async def analyze_project(input_path: str = Body(embed=True)):
         except FileNotFoundError:
             raise HTTPException(status_code=404, detail="File not found")
 
-        prompt = f"""
+        prompt_head = """
         Analyze the following project content and provide a detailed report including:
 
         - A summary of the project's purpose and functionality.
@@ -98,10 +134,11 @@ async def analyze_project(input_path: str = Body(embed=True)):
         - a list of the files that are most complex.
 
         Project Content:
-        {project_content}
+        """
+        prompt_tail = """
 
         Return your analysis in the following JSON structure ONLY:
-        {{
+        {
             "summary": "Project summary",
             "structure": "Description of project structure",
             "technologies": ["Technology 1", "Technology 2", ...],
@@ -110,38 +147,50 @@ async def analyze_project(input_path: str = Body(embed=True)):
             "important_files": ["file1","file2",...],
             "complex_files": ["file1","file2",...],
             "improvements": ["Improvement 1", "Improvement 2", ...],
-            "metrics": {{
+            "metrics": {
                 "complexity": "Estimated complexity",
                 "maintainability": "Estimated maintainability",
                 "code_quality": "Estimated code quality"
-            }},
+            },
             "issues": ["Issue 1", "Issue 2", ...]
-        }}
+        }
         """
-        gemini = GeminiService()
-        response = gemini.generate_content(
+        contents, budget_report = TokenBudget(PROJECT_ANALYSIS_TOKEN_BUDGET).fit(
+            project_prompt_sections(project_content),
+            head=prompt_head,
+            tail=prompt_tail
+        )
+        response = await get_gemini_service().generate_content_async(
             model="gemini-2.0-flash",
-            contents=prompt,
-            config={'response_mime_type': 'application/json'}
+            contents=contents,
+            config={'response_mime_type': 'application/json'},
+            cache_ttl=GEMINI_CACHE_TTL_PROJECT_ANALYSIS,
+            bypass_cache=refresh
         )
 
         if not response or not response.text:
             raise HTTPException(status_code=500, detail="No response from Gemini")
 
         project_analysis = clean_json_response(response.text)
+        if isinstance(project_analysis, dict):
+            project_analysis["token_usage"] = token_usage(response, budget_report)
         return project_analysis
 
+    except GeminiUnavailableError as e:
+        raise HTTPException(status_code=503, detail=f"Project analysis is temporarily unavailable: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing project: {str(e)}")
     
 @router.post("/process_upload/")
 async def process_upload(file: UploadFile = File(...)):
-    temp_file_path = f"temp_{file.filename}"
+    temp_fd, temp_file_path = tempfile.mkstemp(prefix="temp_", suffix=os.path.splitext(file.filename or "")[1])
+    os.close(temp_fd)
     try:
-        with open(temp_file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        await UploadStream().write(temp_file_path, upload_file_chunks(file))
         result = main_processing(temp_file_path)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     finally:
-        os.remove(temp_file_path)
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
     return result
\ No newline at end of file
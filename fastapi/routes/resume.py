@@ -1,30 +1,101 @@
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Query, Request
 from fastapi.responses import JSONResponse
 from services.resume_service import ResumeService
-from models.resume import ResumeProfile, JobDescriptionRequest
+from models.resume import JobDescriptionRequest, SemanticSearchRequest, CandidateFilterRequest, BulkJobMatchRequest
 from services.file_service import FileUploadService
+from services.upload_stream import UploadStream, UploadTooLargeError, websocket_file_chunks
 from services.ranking_service import ResumeRankingService
-from services.gemini_service import GeminiService
-import pathlib
+from services.gemini_policy import CircuitOpenError
+from services.resume_extraction_service import ResumeExtractionService
+from services.reconcile_service import ResumeReconciler
+from services.resume_index import get_resume_index
+from services.semantic_index import get_semantic_index
+from services.facet_index import get_facet_index
+from utils.http_cache import make_etag, not_modified, cache_headers
+from config.settings import RANKING_LEADERBOARD_INTERVAL_SECONDS, RANKING_LEADERBOARD_SIZE, RESUME_EXTRACTION_CONCURRENCY
+from contextlib import aclosing
+from typing import Literal, Optional
+import asyncio
+import base64
 import os
+import re
 import tempfile
 import json
-import aiofiles
+import time
 
 router = APIRouter()
 resume_service = ResumeService()
 
+RESULT_FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+
+def results_store(resumes_file):
+    """
+    The resume store when a request names the server's own results file; None for any other path
+    """
+    return resume_service.store if resume_service.is_results_file(resumes_file) else None
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(decoded, list) or len(decoded) != 2:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return decoded
+
 @router.get("/resume-analysis-results")
-async def get_resume_analysis_results():
+async def get_resume_analysis_results(
+    request: Request,
+    limit: Optional[int] = Query(None, gt=0, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    sort: Optional[Literal["filename", "full_name", "updated_at"]] = None,
+    order: Literal["asc", "desc"] = "asc"
+):
     """
-    Endpoint to retrieve the resume analysis results from resume_analysis_results.json.
+    Endpoint to retrieve the resume analysis results from the resume store.
+    Without query parameters, returns every result keyed by filename.
+    With limit, cursor, fields or sort, returns one page of results: fields is a comma-separated list
+    of dotted paths to keep (e.g. contact_info.full_name,skills.technical_skills), and next_cursor
+    is passed back as cursor to fetch the following page.
+    Responses carry an ETag of the store version and query, so unchanged polls get a 304.
     """
     try:
-        with open("resume_analysis_results.json", 'r') as f:
-            analysis_results = json.load(f)
-        return analysis_results
-    except FileNotFoundError:
-        raise HTTPException(status_code=404, detail="Resume analysis results file not found")
+        etag = make_etag(resume_service.store.signature(), limit, cursor, fields, sort, order)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        if limit is None and cursor is None and fields is None and sort is None:
+            if not resume_service.store.count():
+                raise HTTPException(status_code=404, detail="Resume analysis results file not found")
+            return JSONResponse(content=resume_service.all_results(), headers=cache_headers(etag))
+
+        field_list = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+        for field in field_list or []:
+            if not RESULT_FIELD_PATTERN.match(field):
+                raise HTTPException(status_code=400, detail=f"Invalid field: {field}")
+
+        rows, next_cursor = resume_service.store.page(
+            limit=limit or 100,
+            cursor=decode_cursor(cursor) if cursor else None,
+            sort=sort or "filename",
+            descending=order == "desc",
+            fields=field_list
+        )
+        return JSONResponse(
+            content={
+                "total": resume_service.store.count(),
+                "results": [{"filename": filename, "resume": resume_data} for filename, resume_data in rows],
+                "next_cursor": encode_cursor(next_cursor) if next_cursor else None
+            },
+            headers=cache_headers(etag)
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving resume analysis results: {str(e)}")
     
@@ -36,51 +107,12 @@ async def websocket_resume_endpoint(websocket: WebSocket):
         file_metadata = await websocket.receive_json()
         filename = file_metadata.get('filename', 'uploaded_resume.pdf')
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            while True:
-                file_chunk = await websocket.receive_bytes()
-                if file_chunk == b'EOF':
-                    break
-                temp_file.write(file_chunk)
+        temp_fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(temp_fd)
+        content_hash, _ = await UploadStream().write(temp_path, websocket_file_chunks(websocket))
         
         try:
-            gemini = GeminiService()
-            file_path = pathlib.Path(temp_file.name)
-            
-            sample_file = gemini.upload_file(file_path)
-            
-            prompt = """
-            Perform a COMPREHENSIVE analysis of this resume.
-            CRITICAL INSTRUCTIONS:
-            1. Extract EVERY single detail from the document
-            2. Do NOT skip or summarize - provide FULL information
-            3. If any section is incomplete, explicitly state what's missing
-            4. Ensure maximum detail and precision
-            
-            Extraction Depth:
-            - Contact Info: Full details
-            - Education: Complete academic history
-            - Work Experience: Detailed role descriptions
-            - Skills: Exhaustive technical and soft skills
-            - Projects: All notable projects
-            - Certifications: Complete list
-            - Achievements: All awards, publications, etc.
-            - Summary: A brief overview of the candidate's profile
-            """
-            
-            response = gemini.generate_content(
-                model='gemini-2.0-flash',
-                contents=[sample_file, prompt],
-                config={
-                    'response_mime_type': 'application/json',
-                    'response_schema': ResumeProfile,
-                },
-            )
-            
-            if isinstance(response.parsed, ResumeProfile):
-                result = response.parsed.model_dump()
-            else:
-                result = response.parsed
+            result = await ResumeExtractionService().extract_profile(temp_path, content_hash=content_hash)
 
             await websocket.send_text(json.dumps(result, indent=2))
         
@@ -88,8 +120,10 @@ async def websocket_resume_endpoint(websocket: WebSocket):
             await websocket.send_text(f"Error processing resume: {str(e)}")
         
         finally:
-            os.unlink(temp_file.name)
+            os.unlink(temp_path)
     
+    except UploadTooLargeError as e:
+        await websocket.send_text(f"Upload rejected: {str(e)}")
     except WebSocketDisconnect:
         print("WebSocket connection closed")
     except Exception as e:
@@ -98,78 +132,139 @@ async def websocket_resume_endpoint(websocket: WebSocket):
 
 @router.websocket("/multi-upload")
 async def multi_file_upload_endpoint(websocket: WebSocket):
+    """
+    Receives several resumes over one socket and analyzes them in a pipeline: each file is queued
+    for extraction as soon as it has been received, while later files are still streaming in.
+    A bounded pool of workers does the Gemini upload and extraction, reporting per-file progress.
+    """
     await websocket.accept()
     file_handler = FileUploadService()
-    
+    upload_stream = UploadStream()
+    extractor = ResumeExtractionService()
+    send_lock = asyncio.Lock()
+    workers = []
+
+    async def notify(message):
+        async with send_lock:
+            await websocket.send_text(message)
+
     try:
         file_metadata = await websocket.receive_json()
         num_files = file_metadata.get('num_files', 1)
-        
+        pending_files = asyncio.Queue()
+
+        async def extraction_worker():
+            while True:
+                item = await pending_files.get()
+                if item is None:
+                    return
+                i, safe_filename, destination_path, content_hash = item
+
+                try:
+                    resume_data = await extractor.extract_profile(destination_path, content_hash=content_hash)
+                    status = "complete"
+                except Exception as e:
+                    resume_data = {
+                        "error": f"Error processing file: {str(e)}"
+                    }
+                    status = "failed"
+                # Store write plus index updates (and possibly a taxonomy save) stay off the event loop
+                await asyncio.to_thread(resume_service.update_results, safe_filename, resume_data)
+                await notify(f"Processing {status} for file {i + 1} of {num_files}: {safe_filename}")
+
+        workers = [
+            asyncio.create_task(extraction_worker())
+            for _ in range(max(1, min(RESUME_EXTRACTION_CONCURRENCY, num_files)))
+        ]
+
         for i in range(num_files):
-            await websocket.send_text(f"Processing file {i + 1} of {num_files}")
+            await notify(f"Processing file {i + 1} of {num_files}")
             current_file_metadata = await websocket.receive_json()
             filename = current_file_metadata.get('filename', f'uploaded_file_{i}.pdf')
             
             destination_path, safe_filename = await file_handler.save_uploaded_file(filename)
-            
-            async with aiofiles.open(destination_path, 'wb') as dest_file:
-                while True:
-                    file_chunk = await websocket.receive_bytes()
-                    if file_chunk == b'EOF':
-                        break
-                    await dest_file.write(file_chunk)
-            
-            try:
-                gemini = GeminiService()
-                file_path = pathlib.Path(destination_path)
-                
-                sample_file = gemini.upload_file(file_path)
-                
-                prompt = """
-                Perform a COMPREHENSIVE analysis of this resume.
-                CRITICAL INSTRUCTIONS:
-                1. Extract EVERY single detail from the document
-                2. Do NOT skip or summarize - provide FULL information
-                3. If any section is incomplete, explicitly state what's missing
-                4. Ensure maximum detail and precision
-                
-                Extraction Depth:
-                - Contact Info: Full details
-                - Education: Complete academic history
-                - Work Experience: Detailed role descriptions
-                - Skills: Exhaustive technical and soft skills
-                - Projects: All notable projects
-                - Certifications: Complete list
-                """
-                
-                response = gemini.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=[sample_file, prompt],
-                    config={
-                        'response_mime_type': 'application/json',
-                        'response_schema': ResumeProfile,
-                    },
-                )
-
-                if isinstance(response.parsed, ResumeProfile):
-                    resume_data = response.parsed.model_dump()
-                else:
-                    resume_data = response.parsed
-                resume_service.update_results(safe_filename, resume_data)
-                
-            except Exception as e:
-                error_data = {
-                    "error": f"Error processing file: {str(e)}"
-                }
-                resume_service.update_results(safe_filename, error_data)
-        
-        await websocket.send_text(json.dumps(resume_service.analysis_results, indent=2))
+            content_hash = await file_handler.write_file(
+                destination_path, websocket_file_chunks(websocket), upload_stream=upload_stream
+            )
+
+            await pending_files.put((i, safe_filename, destination_path, content_hash))
+
+        for _ in workers:
+            await pending_files.put(None)
+        await asyncio.gather(*workers)
+        await asyncio.to_thread(resume_service.flush_indexes)
+
+        await websocket.send_text(json.dumps(await asyncio.to_thread(resume_service.all_results), indent=2))
     
+    except UploadTooLargeError as e:
+        await websocket.send_text(f"Upload rejected: {str(e)}")
     except WebSocketDisconnect:
         print("WebSocket connection closed")
     except Exception as e:
         print(f"Unexpected error: {e}")
         await websocket.send_text(f"Unexpected error: {str(e)}")
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+@router.post("/reconcile")
+async def reconcile_uploaded_resumes(force: bool = False, prune: bool = False):
+    """
+    Analyze new or changed PDFs in uploaded_resumes/.
+    force re-analyzes every file, e.g. after a schema change; prune also deletes results of files
+    that were reconciled before and have since been removed from the directory
+    """
+    try:
+        return await ResumeReconciler(resume_service=resume_service).reconcile(force=force, prune=prune)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reconciling uploaded resumes: {str(e)}")
+
+@router.post("/search")
+async def semantic_search(request: SemanticSearchRequest):
+    """
+    Semantic "find candidates like this" search over analyzed resumes, served from the local embedding index
+    """
+    started = time.perf_counter()
+    # A query can trigger an SVD and k-means refit that takes seconds on large corpora, so it runs
+    # in a worker thread instead of on the event loop
+    matches = await asyncio.to_thread(
+        lambda: get_semantic_index(resume_service.results_file).search(request.query, top_k=request.top_k)
+    )
+    resumes = await asyncio.to_thread(resume_service.get_results, [filename for filename, _ in matches])
+    return {
+        "results": [
+            {
+                "filename": filename,
+                "score": score,
+                "full_resume": resumes.get(filename)
+            }
+            for filename, score in matches
+        ],
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+@router.post("/filter")
+async def filter_candidates(request: CandidateFilterRequest):
+    """
+    Structured candidate filtering over skills, technologies, degree types and institutions,
+    e.g. all_of React and Docker, any_of two degree types, none_of an institution
+    """
+    matches = get_facet_index(resume_service.results_file).query(
+        all_of=[term.model_dump() for term in request.all_of],
+        any_of=[term.model_dump() for term in request.any_of],
+        none_of=[term.model_dump() for term in request.none_of]
+    )
+    page = matches[request.offset:request.offset + request.limit]
+    resumes = resume_service.get_results(page)
+    return {
+        "total": len(matches),
+        "offset": request.offset,
+        "limit": request.limit,
+        "results": [
+            {"filename": filename, "full_resume": resumes.get(filename)}
+            for filename in page
+        ]
+    }
 
 @router.options("/rank-resumes")
 async def options_rank_resumes():
@@ -191,26 +286,158 @@ async def rank_resumes(request: JobDescriptionRequest):
     Endpoint to rank resumes against a job description
     """
     ranking_service = ResumeRankingService()
-    resumes = ranking_service.load_resumes(request.resumes_file)
+    resumes = ranking_service.load_resumes(request.resumes_file, store=results_store(request.resumes_file))
     if not resumes:
         resumes = "resume_analysis_results.json"
 
+    index = get_resume_index(resume_service.results_file) if resume_service.is_results_file(request.resumes_file) else None
+
     try:
-        gemini_ranked_resumes = await ranking_service.rank_resumes_with_gemini(
-            request.job_description, 
-            resumes
-        )
+        if request.retrieve_top_k:
+            gemini_ranked_resumes = await ranking_service.rank_resumes_two_stage(
+                request.job_description,
+                resumes,
+                top_k=request.retrieve_top_k,
+                min_score=request.min_retrieval_score,
+                index=index,
+                batched=request.batched
+            )
+            ranking_method = "TF-IDF retrieval + Gemini AI rerank"
+        elif request.batched:
+            gemini_ranked_resumes = await ranking_service.rank_resumes_with_gemini_batched(
+                request.job_description,
+                resumes
+            )
+            ranking_method = "Gemini AI (batched)"
+        else:
+            gemini_ranked_resumes = await ranking_service.rank_resumes_with_gemini(
+                request.job_description, 
+                resumes
+            )
+            ranking_method = "Gemini AI"
         return {
-            "ranking_method": "Gemini AI",
+            "ranking_method": ranking_method,
             "ranked_resumes": gemini_ranked_resumes
         }
     except Exception as e:
         print(f"Gemini ranking failed: {e}. Falling back to cosine similarity.")
         cosine_ranked_resumes = ranking_service.rank_resumes_with_cosine_similarity(
             request.job_description, 
-            resumes
+            resumes,
+            index=index
         )
         return {
             "ranking_method": "Cosine Similarity",
             "ranked_resumes": cosine_ranked_resumes
         }
+
+@router.post("/rank-resumes/bulk")
+async def rank_resumes_bulk(request: BulkJobMatchRequest):
+    """
+    Match several job descriptions against all resumes at once (TF-IDF cosine similarity)
+    """
+    ranking_service = ResumeRankingService()
+    resumes = ranking_service.load_resumes(request.resumes_file, store=results_store(request.resumes_file))
+    index = get_resume_index(resume_service.results_file) if resume_service.is_results_file(request.resumes_file) else None
+
+    resume_ids, scores, top_matches = ranking_service.match_jobs_with_cosine_similarity(
+        request.job_descriptions,
+        resumes,
+        index=index,
+        top_k=request.top_k
+    )
+
+    response = {
+        "ranking_method": "Cosine Similarity",
+        "jobs": [
+            {"job_index": job_index, "top_matches": matches}
+            for job_index, matches in enumerate(top_matches)
+        ]
+    }
+    if request.include_matrix:
+        response["resume_ids"] = resume_ids
+        response["scores"] = scores.round(6).tolist()
+    return response
+
+@router.websocket("/rank-resumes/stream")
+async def rank_resumes_stream(websocket: WebSocket):
+    """
+    Streaming variant of /rank-resumes. The client sends a JobDescriptionRequest as JSON and receives:
+    - {"type": "started"} with the number of resumes to score
+    - {"type": "result"} for every resume as soon as it is scored
+    - {"type": "leaderboard"} with the current top entries, periodically
+    - {"type": "complete"} with the final sorted ranking
+    If the Gemini circuit breaker opens mid-ranking, "complete" carries a cosine similarity ranking instead
+    """
+    await websocket.accept()
+
+    try:
+        request = JobDescriptionRequest(**await websocket.receive_json())
+        ranking_service = ResumeRankingService()
+        resumes = ranking_service.load_resumes(request.resumes_file, store=results_store(request.resumes_file))
+
+        retrieval_scores = {}
+        ranking_method = "Gemini AI"
+        index = get_resume_index(resume_service.results_file) if resume_service.is_results_file(request.resumes_file) else None
+        if request.retrieve_top_k:
+            resumes, retrieval_scores = ranking_service.retrieve_candidates(
+                request.job_description,
+                resumes,
+                top_k=request.retrieve_top_k,
+                min_score=request.min_retrieval_score,
+                index=index
+            )
+            ranking_method = "TF-IDF retrieval + Gemini AI rerank"
+
+        total = sum(1 for resume_data in resumes.values() if resume_data and 'error' not in resume_data)
+        await websocket.send_json({"type": "started", "ranking_method": ranking_method, "total": total})
+
+        ranked_resumes = []
+        last_leaderboard = time.monotonic()
+        async with aclosing(ranking_service.iter_ranked_resumes_with_gemini(request.job_description, resumes)) as results:
+            async for match_data in results:
+                if match_data['filename'] in retrieval_scores:
+                    match_data['retrieval_score'] = retrieval_scores[match_data['filename']]
+                ranked_resumes.append(match_data)
+                await websocket.send_json({
+                    "type": "result",
+                    "scored": len(ranked_resumes),
+                    "total": total,
+                    "result": match_data
+                })
+
+                if time.monotonic() - last_leaderboard >= RANKING_LEADERBOARD_INTERVAL_SECONDS:
+                    last_leaderboard = time.monotonic()
+                    leaders = sorted(ranked_resumes, key=lambda x: x.get('match_percentage', 0), reverse=True)
+                    await websocket.send_json({
+                        "type": "leaderboard",
+                        "scored": len(ranked_resumes),
+                        "total": total,
+                        "leaders": [
+                            {"filename": leader['filename'], "match_percentage": leader.get('match_percentage', 0)}
+                            for leader in leaders[:RANKING_LEADERBOARD_SIZE]
+                        ]
+                    })
+
+        await websocket.send_json({
+            "type": "complete",
+            "ranking_method": ranking_method,
+            "ranked_resumes": sorted(ranked_resumes, key=lambda x: x.get('match_percentage', 0), reverse=True)
+        })
+
+    except CircuitOpenError as e:
+        print(f"Gemini ranking failed: {e}. Falling back to cosine similarity.")
+        await websocket.send_json({
+            "type": "complete",
+            "ranking_method": "Cosine Similarity",
+            "ranked_resumes": ranking_service.rank_resumes_with_cosine_similarity(
+                request.job_description,
+                resumes,
+                index=index
+            )
+        })
+    except WebSocketDisconnect:
+        print("WebSocket connection closed")
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        await websocket.send_json({"type": "error", "message": str(e)})
@@ -1,9 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routes import analytics, bias, chat, email, file, interview, personnel, project, resume
+from routes import analytics, bias, chat, email, file, gemini, interview, jobs, personnel, project, resume
 from middleware.cors import setup_cors
+from middleware.upload_limit import setup_upload_limits
+from services.job_queue import get_job_queue
+from services.resume_service import ResumeService
+from services.gemini_service import get_gemini_service
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Gemini client for the whole process, configured before the first request
+    gemini_service = get_gemini_service()
+    gemini_service.start_file_pruner()
+    job_queue = get_job_queue()
+    job_queue.start()
+    yield
+    await job_queue.stop()
+    ResumeService().flush_indexes()
+    await gemini_service.stop_file_pruner()
 
+app = FastAPI(lifespan=lifespan)
+
+# Added before CORS so that 413 responses still carry CORS headers
+setup_upload_limits(app)
 setup_cors(app)
 
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
@@ -11,7 +30,9 @@ app.include_router(bias.router, prefix="/api/v1/bias", tags=["Bias"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Chat"])
 app.include_router(email.router, prefix="/api/v1/email", tags=["Email"])
 app.include_router(file.router, prefix="/api/v1/file", tags=["File"])
+app.include_router(gemini.router, prefix="/api/v1/gemini", tags=["Gemini"])
 app.include_router(interview.router, prefix="/api/v1/interview", tags=["Interview"])
+app.include_router(jobs.router, prefix="/api/v1/jobs", tags=["Jobs"])
 app.include_router(personnel.router, prefix="/api/v1/personnel", tags=["Personnel"])
 app.include_router(project.router, prefix="/api/v1/project", tags=["Project"])
 app.include_router(resume.router, prefix="/api/v1/resume", tags=["Resume"])
\ No newline at end of file
@@ -4,8 +4,9 @@ import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, Any, Optional
-from services.gemini_service import GeminiService
+from services.gemini_service import get_gemini_service
 from utils.response import clean_json_response
+from config.settings import GEMINI_CACHE_TTL_EMAIL
 import re
 
 class EmailGenerator:
@@ -27,7 +28,7 @@ class EmailGenerator:
         self.gemini_client = None
         self.repo_assignments_file = "repo_assignments.json"
         self.repo_assignments = self._load_repo_assignments()
-        self.gemini_client = GeminiService()
+        self.gemini_client = get_gemini_service()
 
     def _load_repo_assignments(self) -> Dict[str, str]:
         """
@@ -123,6 +124,7 @@ class EmailGenerator:
         response = self.gemini_client.generate_content(
             model="gemini-2.0-flash",
             contents=prompt,
+            cache_ttl=GEMINI_CACHE_TTL_EMAIL
         )
         print(response.text)
 
@@ -0,0 +1,152 @@
+import os
+import threading
+from services.resume_index import sync_index_with_store
+from services.resume_store import get_resume_store
+from services.skill_taxonomy import get_canonical_skills, get_skill_taxonomy
+
+FACET_FIELDS = ("skill", "technology", "degree_type", "institution")
+# Facets whose values are canonical skill IDs, so "ReactJS" and "React.js" filter the same way
+SKILL_FACET_FIELDS = ("skill", "technology")
+
+def normalize_facet_value(value):
+    """
+    Case- and whitespace-insensitive form used for both indexing and querying
+    """
+    return " ".join(str(value).lower().split())
+
+def extract_facets(resume_data):
+    """
+    Facet values of one resume, as a dict of field -> set of values.
+    Skills and technologies are canonical skill IDs; degree types and institutions are normalized strings
+    """
+    facets = {field: set() for field in FACET_FIELDS}
+
+    canonical = get_canonical_skills(resume_data)
+    facets['skill'].update(skill['id'] for skill in canonical['skills'])
+    facets['technology'].update(skill['id'] for skill in canonical['technologies'])
+
+    for edu in resume_data.get('education') or []:
+        degree = edu.get('degree')
+        if degree:
+            facets['degree_type'].add(normalize_facet_value(degree.split(" in ")[0]))
+        institution = edu.get('institution')
+        if institution:
+            facets['institution'].add(normalize_facet_value(institution))
+
+    facets = {field: {value for value in values if value is not None and value != ""} for field, values in facets.items()}
+    return facets
+
+class ResumeFacetIndex:
+    """
+    Inverted index from canonical skill and technology IDs, degree type and institution to resume IDs.
+    Filters are evaluated as set operations over the posting lists, smallest list first,
+    so their cost depends on the size of the postings involved rather than the corpus size.
+    """
+    def __init__(self):
+        self.postings = {field: {} for field in FACET_FIELDS}
+        self.resume_facets = {}
+        self.source_signature = None
+        self._lock = threading.RLock()
+
+    def save(self):
+        # Rebuilt from the resume store on startup; nothing to persist
+        pass
+
+    def upsert(self, resume_id, resume_data, source_signature=None):
+        """
+        Add or replace one resume. Error entries and empty profiles are removed from the index
+        """
+        with self._lock:
+            self._remove(resume_id)
+            if resume_data and 'error' not in resume_data:
+                facets = extract_facets(resume_data)
+                for field, values in facets.items():
+                    for value in values:
+                        self.postings[field].setdefault(value, set()).add(resume_id)
+                self.resume_facets[resume_id] = facets
+            if source_signature is not None:
+                self.source_signature = source_signature
+
+    def remove(self, resume_id, source_signature=None):
+        with self._lock:
+            self._remove(resume_id)
+            if source_signature is not None:
+                self.source_signature = source_signature
+
+    def sync(self, resumes, source_signature=None):
+        """
+        Rebuild the index from a full resumes dict
+        """
+        with self._lock:
+            self.postings = {field: {} for field in FACET_FIELDS}
+            self.resume_facets = {}
+            for resume_id, resume_data in resumes.items():
+                self.upsert(resume_id, resume_data)
+            self.source_signature = source_signature
+
+    def _remove(self, resume_id):
+        facets = self.resume_facets.pop(resume_id, None)
+        if facets is None:
+            return
+        for field, values in facets.items():
+            for value in values:
+                posting = self.postings[field].get(value)
+                if posting is None:
+                    continue
+                posting.discard(resume_id)
+                if not posting:
+                    del self.postings[field][value]
+
+    def _posting(self, term):
+        if term['field'] in SKILL_FACET_FIELDS:
+            value = get_skill_taxonomy().lookup(term['value'], learn=False)
+        else:
+            value = normalize_facet_value(term['value'])
+        return self.postings[term['field']].get(value, set())
+
+    def query(self, all_of=(), any_of=(), none_of=()):
+        """
+        Resume IDs matching every all_of term, at least one any_of term (if given) and no none_of term.
+        Terms are dicts with 'field' and 'value'. Returns a sorted list for stable paging
+        """
+        with self._lock:
+            required = sorted((self._posting(term) for term in all_of), key=len)
+            if required:
+                matches = set(required[0])
+                for posting in required[1:]:
+                    if not matches:
+                        break
+                    matches &= posting
+            else:
+                matches = None
+
+            if any_of:
+                alternatives = set().union(*(self._posting(term) for term in any_of))
+                matches = alternatives if matches is None else matches & alternatives
+
+            if matches is None:
+                matches = set(self.resume_facets)
+
+            for term in none_of:
+                if not matches:
+                    break
+                matches -= self._posting(term)
+
+            return sorted(matches)
+
+_facet_indexes = {}
+_facet_indexes_lock = threading.Lock()
+
+def get_facet_index(results_file='resume_analysis_results.json'):
+    """
+    Return the process-wide facet index for results_file, re-synced if the resume store changed behind its back
+    """
+    results_path = os.path.abspath(results_file)
+    with _facet_indexes_lock:
+        index = _facet_indexes.get(results_path)
+        if index is None:
+            index = ResumeFacetIndex()
+            _facet_indexes[results_path] = index
+
+    sync_index_with_store(index, get_resume_store(results_file))
+    return index
@@ -1,5 +1,6 @@
 import os
 import uuid
+from services.upload_stream import UploadStream
 
 class FileUploadService:
     def __init__(self, upload_directory='uploaded_resumes'):
@@ -27,6 +28,19 @@ class FileUploadService:
         
         return destination_path, safe_filename
     
+    async def write_file(self, destination_path, chunks, upload_stream=None):
+        """
+        Asynchronously stream an async iterable of byte chunks to disk, hashing them on the way.
+        
+        :param destination_path: Path to write to
+        :param chunks: Async iterable of bytes
+        :param upload_stream: UploadStream enforcing the connection's size limits (a fresh one if omitted)
+        :return: Hex sha256 digest of the written content
+        """
+        upload_stream = upload_stream or UploadStream()
+        content_hash, _ = await upload_stream.write(destination_path, chunks)
+        return content_hash
+    
     def _sanitize_filename(self, filename):
         """
         Sanitize the filename to prevent security issues.
@@ -0,0 +1,169 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from google.genai import types
+from config.settings import (
+    GEMINI_FILE_CACHE_FILE,
+    GEMINI_FILE_REUSE_MARGIN_SECONDS,
+    GEMINI_CALL_DEADLINE_SECONDS,
+    GEMINI_UPLOAD_DEADLINE_SECONDS,
+)
+
+# Gemini keeps uploaded files for 48 hours; used when an upload response carries no expiration_time
+DEFAULT_FILE_LIFETIME_SECONDS = 48 * 60 * 60
+
+class GeminiFileCache:
+    """
+    Persistent index from the sha256 of a local file to the Gemini file it was uploaded as.
+
+    Handles are reused until GEMINI_FILE_REUSE_MARGIN_SECONDS before they expire, so a file is only
+    uploaded again once its remote copy is about to disappear. Remote files that are no longer reusable
+    are queued as stale, for GeminiService to delete in the background. A handle that reaches the reuse
+    margin or is replaced by a fresh upload may still be in use by a request that fetched it earlier, so
+    it is kept as retired for at least in_use_grace seconds (the longest Gemini call deadline) first.
+    """
+    def __init__(self, cache_file=GEMINI_FILE_CACHE_FILE, reuse_margin=GEMINI_FILE_REUSE_MARGIN_SECONDS,
+                 in_use_grace=max(GEMINI_CALL_DEADLINE_SECONDS, GEMINI_UPLOAD_DEADLINE_SECONDS)):
+        self.cache_file = cache_file
+        self.reuse_margin = reuse_margin
+        self.in_use_grace = in_use_grace
+        self.stats = {"reused": 0, "uploaded": 0, "invalidated": 0}
+        self._lock = threading.Lock()
+        self.entries, self.stale, self.retired = self.load()
+
+    def load(self):
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+            return data["files"], data["stale"], data.get("retired", [])
+        except FileNotFoundError:
+            return {}, [], []
+        except (json.JSONDecodeError, KeyError):
+            print(f"Warning: {self.cache_file} is corrupted. Starting with an empty Gemini file cache.")
+            return {}, [], []
+
+    def save(self):
+        temp_file = f"{self.cache_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump({"files": self.entries, "stale": self.stale, "retired": self.retired}, f, indent=2)
+        os.replace(temp_file, self.cache_file)
+
+    def get(self, content_hash):
+        """
+        The live remote file for these bytes, or None if there is none that is safe to reuse
+        """
+        with self._lock:
+            entry = self.entries.get(content_hash)
+            if entry is None:
+                return None
+            if entry["expires_at"] - self.reuse_margin <= time.time():
+                self._retire_in_use(self.entries.pop(content_hash))
+                self.save()
+                return None
+            self.stats["reused"] += 1
+            return types.File(
+                name=entry["name"],
+                uri=entry["uri"],
+                mime_type=entry["mime_type"],
+                sha256_hash=entry["sha256_hash"],
+                expiration_time=datetime.fromtimestamp(entry["expires_at"], timezone.utc),
+            )
+
+    def put(self, content_hash, file):
+        """
+        Record a fresh upload; a handle it replaces is deleted once it reaches the reuse margin
+        """
+        expires_at = file.expiration_time.timestamp() if file.expiration_time else time.time() + DEFAULT_FILE_LIFETIME_SECONDS
+        with self._lock:
+            replaced = self.entries.pop(content_hash, None)
+            if replaced is not None and replaced["name"] != file.name:
+                self._retire_in_use(replaced)
+            self.entries[content_hash] = {
+                "name": file.name,
+                "uri": file.uri,
+                "mime_type": file.mime_type,
+                "sha256_hash": file.sha256_hash,
+                "expires_at": expires_at,
+            }
+            self.stats["uploaded"] += 1
+            self.save()
+
+    def content_hash_of(self, name):
+        """
+        Local content hash of the bytes behind a live remote file name, or None if it is not indexed
+        """
+        with self._lock:
+            return next((content_hash for content_hash, entry in self.entries.items() if entry["name"] == name), None)
+
+    def invalidate(self, content_hash, name=None):
+        """
+        Forget a handle Gemini rejected (e.g. deleted remotely), so the next upload goes through.
+        With name, only that remote file is forgotten, not a fresh upload that already replaced it
+        """
+        with self._lock:
+            entry = self.entries.get(content_hash)
+            if entry is not None and name in (None, entry["name"]):
+                self._retire(content_hash)
+                self.stats["invalidated"] += 1
+                self.save()
+
+    def drop_expired(self):
+        """
+        Forget handles whose remote files Gemini has already removed
+        """
+        with self._lock:
+            expired = [content_hash for content_hash, entry in self.entries.items() if entry["expires_at"] <= time.time()]
+            for content_hash in expired:
+                del self.entries[content_hash]
+            if expired:
+                self.save()
+
+    def take_stale(self):
+        """
+        Remove and return the names of stale remote files, including retired ones past the reuse margin
+        """
+        with self._lock:
+            now = time.time()
+            due = [handle for handle in self.retired if handle["delete_after"] <= now]
+            stale, self.stale = self.stale + [handle["name"] for handle in due], []
+            self.retired = [handle for handle in self.retired if handle["delete_after"] > now]
+            if stale:
+                self.save()
+            return stale
+
+    def requeue_stale(self, names):
+        with self._lock:
+            self.stale.extend(name for name in names if name not in self.stale)
+            self.save()
+
+    def _retire_in_use(self, entry):
+        """
+        Queue a handle that requests may still hold for deletion once they can no longer be using it
+        """
+        delete_after = max(entry["expires_at"] - self.reuse_margin, time.time() + self.in_use_grace)
+        self.retired.append({"name": entry["name"], "delete_after": delete_after})
+
+    def _retire(self, content_hash):
+        entry = self.entries.pop(content_hash)
+        # Files past their expiry are already gone on Gemini's side
+        if entry["expires_at"] > time.time():
+            self.stale.append(entry["name"])
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, "files": len(self.entries), "stale": len(self.stale), "retired": len(self.retired)}
+
+_gemini_file_cache = None
+_gemini_file_cache_lock = threading.Lock()
+
+def get_gemini_file_cache():
+    """
+    Return the process-wide Gemini file handle cache
+    """
+    global _gemini_file_cache
+    with _gemini_file_cache_lock:
+        if _gemini_file_cache is None:
+            _gemini_file_cache = GeminiFileCache()
+        return _gemini_file_cache
@@ -0,0 +1,192 @@
+import asyncio
+import random
+import threading
+import time
+import requests
+from google.genai import errors
+from config.settings import (
+    GEMINI_CALL_DEADLINE_SECONDS,
+    GEMINI_RETRY_MAX_ATTEMPTS,
+    GEMINI_RETRY_BASE_DELAY_SECONDS,
+    GEMINI_RETRY_MAX_DELAY_SECONDS,
+    GEMINI_BREAKER_FAILURE_THRESHOLD,
+    GEMINI_BREAKER_RESET_SECONDS,
+)
+
+# Status codes worth retrying: timeouts, rate limits and server-side failures
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class GeminiUnavailableError(Exception):
+    """
+    Gemini could not answer within the call policy; callers with a local fallback should use it
+    """
+
+class CircuitOpenError(GeminiUnavailableError):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Gemini circuit breaker is open, retry in {retry_after:.0f}s")
+
+class GeminiDeadlineExceededError(GeminiUnavailableError):
+    pass
+
+def is_retryable(error):
+    if isinstance(error, errors.APIError):
+        return error.code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def is_outage(error):
+    """
+    Whether a retryable error points at Gemini being down; rate limits (429) mean it is up but busy
+    """
+    return not (isinstance(error, errors.APIError) and error.code == 429)
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failed calls. While open, calls are refused until
+    reset_seconds have passed; then one probe call per reset window is let through (half-open), and its
+    outcome closes the breaker again or keeps it open.
+    """
+    def __init__(self, failure_threshold=GEMINI_BREAKER_FAILURE_THRESHOLD, reset_seconds=GEMINI_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"opened": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go out now
+        """
+        with self._lock:
+            if self.state == "closed":
+                return
+            waited = time.monotonic() - self.opened_at
+            if waited < self.reset_seconds:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.reset_seconds - waited)
+            # This caller is the probe; others keep failing fast until the next window
+            self.state = "half_open"
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                if self.state == "closed":
+                    self.stats["opened"] += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def get_stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+class GeminiCallPolicy:
+    """
+    Per-call deadline, full-jitter exponential backoff on retryable errors and a shared circuit breaker.
+
+    Each attempt is handed the time left until the deadline so the HTTP request itself is bounded.
+    Non-retryable errors (e.g. 400 for a bad prompt) are raised at once and do not count against the breaker.
+    A call counts as one breaker failure once its retries are exhausted, and only if its last error was
+    an outage rather than a rate limit.
+    """
+    def __init__(self, breaker=None, max_attempts=GEMINI_RETRY_MAX_ATTEMPTS,
+                 base_delay=GEMINI_RETRY_BASE_DELAY_SECONDS, max_delay=GEMINI_RETRY_MAX_DELAY_SECONDS,
+                 deadline=GEMINI_CALL_DEADLINE_SECONDS):
+        self.breaker = breaker or CircuitBreaker()
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.stats = {"calls": 0, "retries": 0, "failures": 0, "deadline_exceeded": 0}
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _after_failure(self, error, attempt, deadline_at):
+        """
+        Seconds to sleep before the next attempt; re-raises when the error is final
+        """
+        if not is_retryable(error):
+            self.breaker.record_success()
+            self.stats["failures"] += 1
+            raise error
+        if self.breaker.state != "closed":
+            # A failed half-open probe reopens the breaker rather than retrying into it
+            self._record_final_failure(error)
+            self.stats["failures"] += 1
+            raise error
+        delay = self._backoff(attempt)
+        if time.monotonic() + delay >= deadline_at:
+            self._record_final_failure(error)
+            self.stats["deadline_exceeded"] += 1
+            raise GeminiDeadlineExceededError(f"Gemini call did not succeed before its deadline: {error!r}") from error
+        if attempt + 1 >= self.max_attempts:
+            self._record_final_failure(error)
+            self.stats["failures"] += 1
+            raise error
+        self.stats["retries"] += 1
+        return delay
+
+    def _record_final_failure(self, error):
+        if is_outage(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _remaining(self, deadline_at, last_error=None):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            if last_error is not None:
+                self._record_final_failure(last_error)
+            self.stats["deadline_exceeded"] += 1
+            raise GeminiDeadlineExceededError("Gemini call did not succeed before its deadline")
+        return remaining
+
+    def run(self, call, deadline=None):
+        """
+        Run call(timeout_seconds) under the policy, blocking between retries
+        """
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        self.stats["calls"] += 1
+        last_error = None
+        for attempt in range(self.max_attempts):
+            timeout = self._remaining(deadline_at, last_error)
+            self.breaker.before_call()
+            try:
+                result = call(timeout)
+            except Exception as e:
+                last_error = e
+                time.sleep(self._after_failure(e, attempt, deadline_at))
+                continue
+            self.breaker.record_success()
+            return result
+
+    async def run_async(self, call, deadline=None):
+        """
+        Await call(timeout_seconds) under the policy; each attempt is also cancelled at the deadline
+        """
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        self.stats["calls"] += 1
+        last_error = None
+        for attempt in range(self.max_attempts):
+            timeout = self._remaining(deadline_at, last_error)
+            self.breaker.before_call()
+            try:
+                result = await asyncio.wait_for(call(timeout), timeout)
+            except Exception as e:
+                last_error = e
+                await asyncio.sleep(self._after_failure(e, attempt, deadline_at))
+                continue
+            self.breaker.record_success()
+            return result
+
+    def get_stats(self):
+        return {**self.stats, "breaker": self.breaker.get_stats()}
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from google.genai import types
+from pydantic import BaseModel
+from config.settings import GEMINI_CACHE_FILE, GEMINI_CACHE_MAX_BYTES
+
+class UncacheableContentsError(Exception):
+    """
+    Raised while keying contents that hold an uploaded file with no known local content hash
+    """
+
+def _stable_json(value, file_hash=None):
+    """
+    Deterministic JSON for cache keys. Pydantic schema classes are keyed by their JSON schema,
+    uploaded files by the local content hash file_hash(name) returns for them. Remote names and URIs
+    change with every upload, so a file without a local hash makes the call uncacheable
+    """
+    def default(obj):
+        if isinstance(obj, types.File):
+            content_hash = file_hash(obj.name) if file_hash else None
+            if not content_hash:
+                raise UncacheableContentsError(f"No local content hash for {obj.name}")
+            return {"file": content_hash}
+        if isinstance(obj, type) and issubclass(obj, BaseModel):
+            return {"schema": obj.__name__, "json_schema": obj.model_json_schema()}
+        if isinstance(obj, BaseModel):
+            return obj.model_dump(mode='json', exclude_none=True)
+        if isinstance(obj, bytes):
+            return {"bytes": hashlib.sha256(obj).hexdigest()}
+        return repr(obj)
+    return json.dumps(value, sort_keys=True, default=default)
+
+def make_cache_key(model, contents, config, file_hash=None):
+    """
+    sha256 over (model, config, sha256 of contents), or None if the contents cannot be keyed
+    """
+    try:
+        contents_hash = hashlib.sha256(_stable_json(contents, file_hash).encode('utf-8')).hexdigest()
+    except UncacheableContentsError:
+        return None
+    return hashlib.sha256(_stable_json([model, config, contents_hash]).encode('utf-8')).hexdigest()
+
+class GeminiResponseCache:
+    """
+    On-disk cache of Gemini responses, keyed by make_cache_key.
+
+    Entries live in a local SQLite file with a per-entry expiry set by the caller's TTL. When the total
+    size exceeds max_bytes, the least recently used entries are evicted. Responses are stored as JSON;
+    a structured `parsed` result is rebuilt from the response text and the config's response_schema.
+    """
+    def __init__(self, cache_file=GEMINI_CACHE_FILE, max_bytes=GEMINI_CACHE_MAX_BYTES):
+        self.cache_file = cache_file
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(cache_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def get(self, key, config=None):
+        """
+        Cached response for key, or None on a miss or an expired entry
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT response, size, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            response, size, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.stats["hits"] += 1
+        return self._restore(response, config)
+
+    def put(self, key, response, ttl_seconds):
+        """
+        Store a response for ttl_seconds, then evict least recently used entries beyond max_bytes
+        """
+        serialized = response.model_dump_json(exclude_none=True, exclude={'parsed'})
+        size = len(serialized.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            previous = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if previous:
+                self._total_bytes -= previous[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, size, now + ttl_seconds, now)
+            )
+            self._total_bytes += size
+            self.stats["stores"] += 1
+            while self._total_bytes > self.max_bytes:
+                oldest = conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                conn.execute("DELETE FROM responses WHERE key = ?", (oldest[0],))
+                self._total_bytes -= oldest[1]
+                self.stats["evictions"] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self.stats["bypassed"] += 1
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    def get_stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _restore(self, serialized, config):
+        response = types.GenerateContentResponse.model_validate_json(serialized)
+        schema = (config or {}).get('response_schema') if isinstance(config, dict) else None
+        if isinstance(schema, type) and issubclass(schema, BaseModel):
+            try:
+                response.parsed = schema.model_validate_json(response.text)
+            except Exception:
+                response.parsed = None
+        return response
+
+_gemini_response_cache = None
+_gemini_response_cache_lock = threading.Lock()
+
+def get_gemini_response_cache():
+    """
+    Return the process-wide Gemini response cache
+    """
+    global _gemini_response_cache
+    with _gemini_response_cache_lock:
+        if _gemini_response_cache is None:
+            _gemini_response_cache = GeminiResponseCache()
+        return _gemini_response_cache
@@ -1,19 +1,218 @@
 from google import genai
+from google.genai import errors
+import asyncio
 import os
+import threading
+import math
+from config.settings import GEMINI_CACHE_ENABLED, GEMINI_UPLOAD_DEADLINE_SECONDS, GEMINI_FILE_PRUNE_INTERVAL_SECONDS
+from services.gemini_response_cache import get_gemini_response_cache, make_cache_key
+from services.gemini_policy import GeminiCallPolicy
+from services.gemini_file_cache import get_gemini_file_cache
+from utils.file_stat import hash_file
 
 class GeminiService:
-    def __init__(self):
-        self.client = genai.Client(api_key=os.getenv("GOOGLE_API_KEY"))
+    """
+    Thin wrapper around one genai.Client.
+    Use get_gemini_service() for the process-wide instance instead of constructing one per request;
+    async callers should use the *_async methods so LLM calls never block the event loop.
 
-    def upload_file(self, file_path):
+    Responses are cached on disk only for call sites that pass cache_ttl (seconds); bypass_cache
+    skips the lookup but still stores the fresh response.
+
+    Calls that reach the API go through a GeminiCallPolicy (deadline, retries with backoff, circuit
+    breaker); deadline overrides the policy's default for one call. Cache hits are served even while
+    the breaker is open.
+
+    Uploaded files are indexed by content hash (GeminiFileCache), so the same bytes are uploaded once
+    per remote file lifetime, and concurrent async uploads of the same bytes share one upload;
+    replaced handles are deleted by a background pruner.
+    """
+    def __init__(self, api_key=None, response_cache=None, policy=None, file_cache=None):
+        self.client = genai.Client(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+        self._response_cache = response_cache
+        self.policy = policy or GeminiCallPolicy()
+        self.file_cache = file_cache or get_gemini_file_cache()
+        self._pruner_task = None
+        self._background_tasks = set()
+        self._uploads_in_flight = {}
+
+    @property
+    def response_cache(self):
+        if self._response_cache is None and GEMINI_CACHE_ENABLED:
+            self._response_cache = get_gemini_response_cache()
+        return self._response_cache
+
+    def _cached_response(self, model, contents, config, cache_ttl, bypass_cache):
+        """
+        (cache key, cached response) for a call; the key is None when the call is not cached
+        """
+        cache = self.response_cache
+        if not cache_ttl or cache is None:
+            return None, None
+        key = make_cache_key(model, contents, config, file_hash=self.file_cache.content_hash_of)
+        if key is None:
+            return None, None
+        if bypass_cache:
+            cache.record_bypass()
+            return key, None
+        return key, cache.get(key, config)
+
+    def _store_response(self, key, response, cache_ttl):
+        if key is not None and response.text:
+            self.response_cache.put(key, response, cache_ttl)
+
+    def _with_timeout(self, config, timeout):
+        """
+        config with the SDK's per-request HTTP timeout (milliseconds) set to the time left for the call
+        """
+        http_options = {'timeout': math.ceil(timeout * 1000)}
+        if config is None:
+            return {'http_options': http_options}
+        if isinstance(config, dict):
+            return {**config, 'http_options': http_options}
+        return config.model_copy(update={'http_options': http_options})
+
+    def upload_file(self, file_path, content_hash=None):
         """
         Uploads a file to Gemini and returns the file object.
+        A live handle uploaded earlier from the same bytes is returned instead
+        """
+        content_hash = content_hash or hash_file(file_path)
+        sample_file = self.file_cache.get(content_hash)
+        if sample_file is not None:
+            return sample_file
+        sample_file = self.policy.run(
+            lambda timeout: self.client.files.upload(file=file_path),
+            deadline=GEMINI_UPLOAD_DEADLINE_SECONDS
+        )
+        self.file_cache.put(content_hash, sample_file)
+        return sample_file
+
+    async def upload_file_async(self, file_path, content_hash=None):
+        """
+        Async counterpart of upload_file. Callers uploading the same bytes at the same time share one upload
         """
-        return self.client.files.upload(file=file_path)
+        content_hash = content_hash or await asyncio.to_thread(hash_file, file_path)
+        sample_file = self.file_cache.get(content_hash)
+        if sample_file is not None:
+            return sample_file
+
+        in_flight = self._uploads_in_flight.get(content_hash)
+        if in_flight is not None:
+            return await asyncio.shield(in_flight)
+
+        upload = asyncio.ensure_future(self._upload_async(file_path, content_hash))
+        self._uploads_in_flight[content_hash] = upload
+        try:
+            return await upload
+        finally:
+            self._uploads_in_flight.pop(content_hash, None)
+
+    async def _upload_async(self, file_path, content_hash):
+        sample_file = await self.policy.run_async(
+            lambda timeout: self.client.aio.files.upload(file=file_path),
+            deadline=GEMINI_UPLOAD_DEADLINE_SECONDS
+        )
+        self.file_cache.put(content_hash, sample_file)
+        if self.file_cache.stale:
+            task = asyncio.create_task(self.delete_stale_files())
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        return sample_file
+
+    def forget_uploaded_file(self, content_hash, name=None):
+        """
+        Drop the cached handle for these bytes, e.g. after Gemini reported the remote file missing
+        """
+        self.file_cache.invalidate(content_hash, name)
+
+    async def delete_stale_files(self):
+        """
+        Delete remote files whose handles were replaced or retired. Files already gone count as deleted;
+        other failures are queued again for the next run
+        """
+        self.file_cache.drop_expired()
+        failed = []
+        for name in self.file_cache.take_stale():
+            try:
+                await self.client.aio.files.delete(name=name)
+            except errors.ClientError as e:
+                if e.code not in (403, 404):
+                    failed.append(name)
+            except Exception as e:
+                print(f"Error deleting Gemini file {name}: {e}")
+                failed.append(name)
+        if failed:
+            self.file_cache.requeue_stale(failed)
+
+    def start_file_pruner(self, interval=GEMINI_FILE_PRUNE_INTERVAL_SECONDS):
+        """
+        Delete stale remote files every interval seconds until stop_file_pruner
+        """
+        async def prune_periodically():
+            while True:
+                await self.delete_stale_files()
+                await asyncio.sleep(interval)
+
+        if self._pruner_task is None:
+            self._pruner_task = asyncio.create_task(prune_periodically())
+
+    async def stop_file_pruner(self):
+        tasks = list(self._background_tasks) + ([self._pruner_task] if self._pruner_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pruner_task = None
+
+    def generate_content(self, contents, model="gemini-2.0-flash", config={'response_mime_type': 'application/json'},
+                         cache_ttl=None, bypass_cache=False, deadline=None):
+        """
+        Blocking call for sync callers (e.g. EmailGenerator, run in a worker thread by the email routes);
+        async code should use generate_content_async.
+        """
+        key, response = self._cached_response(model, contents, config, cache_ttl, bypass_cache)
+        if response is not None:
+            return response
+        response = self.policy.run(
+            lambda timeout: self.client.models.generate_content(
+                model=model,
+                contents=contents,
+                config=self._with_timeout(config, timeout)
+            ),
+            deadline=deadline
+        )
+        self._store_response(key, response, cache_ttl)
+        return response
+
+    async def generate_content_async(self, contents, model="gemini-2.0-flash", config={'response_mime_type': 'application/json'},
+                                     cache_ttl=None, bypass_cache=False, deadline=None):
+        """
+        Same as generate_content, but goes through the SDK's async client so
+        the calling coroutine does not block the event loop.
+        """
+        key, response = self._cached_response(model, contents, config, cache_ttl, bypass_cache)
+        if response is not None:
+            return response
+        response = await self.policy.run_async(
+            lambda timeout: self.client.aio.models.generate_content(
+                model=model,
+                contents=contents,
+                config=self._with_timeout(config, timeout)
+            ),
+            deadline=deadline
+        )
+        self._store_response(key, response, cache_ttl)
+        return response
+
+_gemini_service = None
+_gemini_service_lock = threading.Lock()
 
-    def generate_content(self, contents, model="gemini-2.0-flash", config={'response_mime_type': 'application/json'}):
-        return self.client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config
-        )
\ No newline at end of file
+def get_gemini_service():
+    """
+    Return the process-wide GeminiService, created on first use (the server creates it at startup)
+    """
+    global _gemini_service
+    with _gemini_service_lock:
+        if _gemini_service is None:
+            _gemini_service = GeminiService()
+        return _gemini_service
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from services.resume_service import ResumeService
+from services.resume_extraction_service import ResumeExtractionService
+from config.settings import RESUME_JOB_DB_FILE, RESUME_JOB_WORKERS
+
+FILE_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+
+class ResumeJobQueue:
+    """
+    Persistent queue of resume extraction jobs, drained by a pool of async workers.
+
+    Jobs and their files are stored in SQLite, so submitted work outlives the request that submitted
+    it: files that were mid-extraction when the process stopped are re-queued on the next start.
+    Workers run on the server's event loop next to the async Gemini client and write every
+    extracted profile to ResumeService, in a worker thread, as soon as it is ready. Each file's result is also kept on
+    its job_files row, so a job's results are not replaced when a later upload reuses a filename.
+    """
+    def __init__(self, db_file=RESUME_JOB_DB_FILE, workers=RESUME_JOB_WORKERS, resume_service=None, extractor=None):
+        self.db_file = db_file
+        self.num_workers = workers
+        self.resume_service = resume_service or ResumeService()
+        self.extractor = extractor
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "cancelled INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_files ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL REFERENCES jobs(id), "
+                "filename TEXT NOT NULL, path TEXT NOT NULL, content_hash TEXT, "
+                "status TEXT NOT NULL, error TEXT, result TEXT, updated_at REAL NOT NULL)"
+            )
+            columns = [column[1] for column in conn.execute("PRAGMA table_info(job_files)")]
+            if "result" not in columns:
+                conn.execute("ALTER TABLE job_files ADD COLUMN result TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS job_files_status ON job_files (status, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS job_files_job ON job_files (job_id, id)")
+        self._workers = []
+        self._running = {}
+        self._wakeup = None
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def start(self):
+        """
+        Re-queue files interrupted by a previous shutdown and start the worker pool on the running loop
+        """
+        if self._workers:
+            return
+        if self.extractor is None:
+            self.extractor = ResumeExtractionService()
+        with self._transaction() as conn:
+            conn.execute("UPDATE job_files SET status = 'queued' WHERE status = 'running'")
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self):
+        """
+        Stop the workers. Files they were extracting stay 'running' and are re-queued on the next start
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, files):
+        """
+        Queue a job for a list of (filename, path, content_hash) tuples. Returns the job ID
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO jobs (id, created_at, updated_at) VALUES (?, ?, ?)", (job_id, now, now))
+            conn.executemany(
+                "INSERT INTO job_files (job_id, filename, path, content_hash, status, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?)",
+                [(job_id, filename, path, content_hash, now) for filename, path, content_hash in files]
+            )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id
+
+    def status(self, job_id):
+        """
+        Job state with per-status counts and per-file progress, or None for an unknown job
+        """
+        with self._lock:
+            job = self._conn.execute(
+                "SELECT created_at, updated_at, cancelled FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            files = self._conn.execute(
+                "SELECT filename, status, error FROM job_files WHERE job_id = ? ORDER BY id", (job_id,)
+            ).fetchall()
+
+        created_at, updated_at, cancelled = job
+        counts = {status: 0 for status in FILE_STATUSES}
+        for _, status, _ in files:
+            counts[status] += 1
+
+        if cancelled:
+            job_status = "cancelled"
+        elif counts["queued"] + counts["running"] == 0:
+            job_status = "completed"
+        elif counts["queued"] == len(files):
+            job_status = "queued"
+        else:
+            job_status = "running"
+
+        return {
+            "job_id": job_id,
+            "status": job_status,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "total": len(files),
+            "counts": counts,
+            "files": [
+                {"filename": filename, "status": status, "error": error}
+                for filename, status, error in files
+            ]
+        }
+
+    def results(self, job_id):
+        """
+        Extraction results of the job's finished files so far, as a dict of filename -> profile
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, result FROM job_files "
+                "WHERE job_id = ? AND status IN ('completed', 'failed') ORDER BY id",
+                (job_id,)
+            ).fetchall()
+        results = {filename: json.loads(result) for filename, result in rows if result is not None}
+        # Files finished before results were kept per job are only in the shared store
+        legacy = [filename for filename, result in rows if result is None]
+        if legacy:
+            results.update(self.resume_service.get_results(legacy))
+        return results
+
+    def cancel(self, job_id):
+        """
+        Cancel the job's queued files and interrupt the ones being extracted.
+        Finished jobs are left as they are. Returns False for an unknown job
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            if conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                return False
+            cancelled = conn.execute(
+                "UPDATE job_files SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (now, job_id)
+            ).rowcount
+            running = [file_id for file_id, in conn.execute(
+                "SELECT id FROM job_files WHERE job_id = ? AND status = 'running'", (job_id,)
+            )]
+            if cancelled or running:
+                conn.execute("UPDATE jobs SET cancelled = 1, updated_at = ? WHERE id = ?", (now, job_id))
+        for file_id in running:
+            task = self._running.get(file_id)
+            if task is not None:
+                task.cancel()
+        return True
+
+    def _claim(self):
+        """
+        Mark the oldest queued file as running and return it, or None if the queue is empty
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, job_id, filename, path, content_hash FROM job_files "
+                "WHERE status = 'queued' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE job_files SET status = 'running', updated_at = ? WHERE id = ?", (time.time(), row[0])
+                )
+        return row
+
+    def _finish(self, file_id, job_id, status, error=None, result=None):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE job_files SET status = ?, error = ?, result = ?, updated_at = ? WHERE id = ?",
+                (status, error, json.dumps(result) if result is not None else None, now, file_id)
+            )
+            conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+
+    async def _worker(self):
+        while True:
+            try:
+                item = self._claim()
+            except Exception as e:
+                # e.g. the queue database is locked or unavailable; try again shortly
+                print(f"Error claiming a resume extraction job: {e}")
+                await asyncio.sleep(1)
+                continue
+            if item is None:
+                # The queue has drained: persist the ranking index once for the whole batch
+                try:
+                    await asyncio.to_thread(self.resume_service.flush_indexes)
+                except Exception as e:
+                    print(f"Error saving the resume index: {e}")
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            file_id, job_id = item[0], item[1]
+            try:
+                await self._run(file_id, job_id, *item[2:])
+            except Exception as e:
+                # One bad file must never end the worker
+                print(f"Error finishing job file {file_id}: {e}")
+
+    async def _run(self, file_id, job_id, filename, path, content_hash):
+        extraction = asyncio.ensure_future(self._extract(filename, path, content_hash))
+        self._running[file_id] = extraction
+        try:
+            await asyncio.wait([extraction])
+        finally:
+            self._running.pop(file_id, None)
+            if not extraction.done():
+                extraction.cancel()
+
+        if extraction.cancelled():
+            self._finish(file_id, job_id, "cancelled")
+        elif extraction.exception() is not None:
+            error = f"Error processing file: {extraction.exception()}"
+            self._finish(file_id, job_id, "failed", error, {"error": error})
+        else:
+            self._finish(file_id, job_id, *extraction.result())
+
+    async def _extract(self, filename, path, content_hash):
+        """
+        Extract one file and store the result. Returns (status, error, result); a failed extraction
+        or store write marks the file failed
+        """
+        try:
+            resume_data = await self.extractor.extract_profile(path, content_hash=content_hash)
+            stored = await asyncio.to_thread(self.resume_service.update_results, filename, resume_data)
+            return "completed", None, stored
+        except Exception as e:
+            print(f"Error processing {filename}: {e}")
+            error = f"Error processing file: {str(e)}"
+        try:
+            await asyncio.to_thread(self.resume_service.update_results, filename, {"error": error})
+        except Exception as e:
+            print(f"Error storing the failure of {filename}: {e}")
+        return "failed", error, {"error": error}
+
+_job_queue = None
+
+def get_job_queue():
+    """
+    Return the process-wide resume extraction job queue
+    """
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = ResumeJobQueue()
+    return _job_queue
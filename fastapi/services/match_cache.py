@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from config.settings import MATCH_CACHE_FILE, MATCH_CACHE_MAX_ENTRIES, MATCH_CACHE_TTL_SECONDS
+
+# Bump when the match prompt or its output format changes, so stale results are not reused
+MATCH_PROMPT_VERSION = "1"
+
+class MatchResultCache:
+    """
+    Persistent, content-addressed cache of Gemini match results.
+    Keys are the hash of the normalized job description plus the hash of the resume text,
+    so a renamed or re-uploaded resume with the same content still hits. Entries expire after
+    ttl_seconds and the least recently used ones are evicted beyond max_entries.
+    """
+    def __init__(self, cache_file=MATCH_CACHE_FILE, max_entries=MATCH_CACHE_MAX_ENTRIES, ttl_seconds=MATCH_CACHE_TTL_SECONDS):
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """
+        Load cached entries from the JSON file, dropping any that already expired
+        """
+        try:
+            with open(self.cache_file, 'r') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            stored = {}
+        except json.JSONDecodeError:
+            print(f"Warning: {self.cache_file} is corrupted. Starting with an empty match cache.")
+            stored = {}
+
+        now = time.time()
+        self.entries = OrderedDict(
+            (key, entry) for key, entry in stored.items()
+            if now - entry.get('created_at', 0) < self.ttl_seconds
+        )
+
+    def save(self):
+        """
+        Write the cache back to disk if anything changed since the last save.
+        Entries are snapshotted under the lock and serialized outside it, so lookups are not held up
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = dict(self.entries)
+                self._dirty = False
+            try:
+                temp_file = f"{self.cache_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(temp_file, self.cache_file)
+            except BaseException:
+                self._dirty = True
+                raise
+
+    async def save_async(self):
+        """
+        save() in a worker thread, for callers on the event loop
+        """
+        await asyncio.to_thread(self.save)
+
+    def make_key(self, job_description, resume_text):
+        normalized_job = " ".join(job_description.lower().split())
+        job_hash = hashlib.sha256(normalized_job.encode('utf-8')).hexdigest()
+        resume_hash = hashlib.sha256(resume_text.encode('utf-8')).hexdigest()
+        return f"{MATCH_PROMPT_VERSION}:{job_hash}:{resume_hash}"
+
+    def get(self, job_description, resume_text):
+        """
+        Return a copy of the cached match data, or None on a miss or an expired entry
+        """
+        key = self.make_key(job_description, resume_text)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry['created_at'] >= self.ttl_seconds:
+                del self.entries[key]
+                self._dirty = True
+                return None
+            self.entries.move_to_end(key)
+            return dict(entry['match_data'])
+
+    def put(self, job_description, resume_text, match_data):
+        """
+        Store match data without the per-request fields (filename, full resume, cache status)
+        """
+        key = self.make_key(job_description, resume_text)
+        stored = {
+            field: value for field, value in match_data.items()
+            if field not in ('filename', 'full_resume', 'cache_status', 'retrieval_score')
+        }
+        with self._lock:
+            self.entries[key] = {'created_at': time.time(), 'match_data': stored}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._dirty = True
+
+_match_cache = None
+_match_cache_lock = threading.Lock()
+
+def get_match_cache():
+    """
+    Return the process-wide match result cache
+    """
+    global _match_cache
+    with _match_cache_lock:
+        if _match_cache is None:
+            _match_cache = MatchResultCache()
+        return _match_cache
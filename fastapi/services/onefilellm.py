@@ -4,7 +4,6 @@ from urllib.parse import urljoin, urlparse
 from PyPDF2 import PdfReader
 import os
 import sys
-import tiktoken
 import nltk
 from nltk.corpus import stopwords
 import re
@@ -23,6 +22,8 @@ from rich.progress import Progress, TextColumn, BarColumn, TimeRemainingColumn
 from dotenv import load_dotenv
 import xml.etree.ElementTree as ET
 from config import settings
+from utils.text_compression import compress_text
+from services.token_budget import get_encoder, estimate_tokens
 # Load environment variables from a .env file if it exists
 load_dotenv()
 
@@ -277,17 +278,8 @@ def preprocess_text(input_file, output_file):
         input_text = input_file.read()
 
     def process_text(text):
-        text = re.sub(r"[\n\r]+", "\n", text)
-        # Update the following line to include apostrophes and quotation marks
-        text = re.sub(r"[^a-zA-Z0-9\s_.,!?:;@#$%^&*()+\-=[\]{}|\\<>`~'\"/]+", "", text)
-        text = re.sub(r"\s+", " ", text)
-        text = text.lower()
         # Only remove stopwords if the feature is enabled and stopwords were loaded
-        if settings.ENABLE_COMPRESSION_AND_NLTK and stop_words:
-            words = text.split()
-            words = [word for word in words if word not in stop_words]
-            text = " ".join(words)
-        return text # Return the possibly modified text
+        return compress_text(text, stop_words if settings.ENABLE_COMPRESSION_AND_NLTK else None)
 
     try:
         # Try to parse the input as XML
@@ -318,7 +310,9 @@ def get_token_count(text, disallowed_special=[], chunk_size=1000):
     #
     # Since we now use plain text format with no XML tags, we can count tokens directly
     # from the text, leading to more accurate token counts and better performance.
-    enc = tiktoken.get_encoding("cl100k_base")
+    enc = get_encoder()
+    if enc is None:
+        return estimate_tokens(text)
 
     # Split the text into smaller chunks
     chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
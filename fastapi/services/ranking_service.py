@@ -1,21 +1,34 @@
 import asyncio
 import os
 import json
+import numpy as np
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from services.gemini_service import GeminiService
-import numpy as np
+from services.gemini_service import get_gemini_service
+from services.resume_index import ResumeTfidfIndex
+from services.match_cache import get_match_cache
+from services.gemini_policy import CircuitOpenError
+from services.token_budget import count_tokens
+from config.settings import GEMINI_RANKING_CONCURRENCY, GEMINI_BATCH_TOKEN_BUDGET, GEMINI_BATCH_MAX_RESUMES, GEMINI_RANKING_DEADLINE_SECONDS
+from utils.resume_text import convert_resume_to_text
+
+# Prompt framing around the job description, and per-resume framing plus expected output
+BATCH_PROMPT_OVERHEAD_TOKENS = 300
+BATCH_PER_RESUME_OVERHEAD_TOKENS = 200
 
 class ResumeRankingService:
-    def __init__(self):
-        self.genai_client = GeminiService()
+    def __init__(self, max_concurrency=GEMINI_RANKING_CONCURRENCY, genai_client=None):
+        self.genai_client = genai_client or get_gemini_service()
+        self.max_concurrency = max_concurrency
+        self.match_cache = get_match_cache()
 
-    def load_resumes(self, resumes_file):
+    def load_resumes(self, resumes_file, store=None):
         """
-        Load resumes from JSON file
+        Load resumes from the server's resume store when given, otherwise read resumes_file as JSON.
+        Other files are only read: no store, index or taxonomy is created for a client-supplied path
         """
+        if store is not None:
+            return store.all()
         try:
             with open(resumes_file, 'r') as f:
                 return json.load(f)
@@ -24,128 +37,346 @@ class ResumeRankingService:
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid JSON in resumes file")
 
-    async def rank_resumes_with_gemini(self, job_description, resumes):
+    async def rank_resumes_with_gemini(self, job_description, resumes, max_concurrency=None):
         """
         Rank resumes using Gemini's advanced matching capabilities
         Includes full resume analysis for each ranked resume
+        Resumes are scored concurrently, with at most max_concurrency requests in flight
+        Cached results are reused, so only new or changed resumes cost a Gemini call
+        Raises CircuitOpenError as soon as the Gemini circuit breaker opens, so callers can fall back
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        ranked_resumes, pending = self._split_cached(job_description, resumes)
+
+        async def score(filename, resume_data):
+            async with semaphore:
+                return await self._score_resume(job_description, filename, resume_data)
+
+        try:
+            results = await self._gather_or_cancel(
+                score(filename, resume_data) for filename, resume_data in pending.items()
+            )
+        finally:
+            await self.match_cache.save_async()
+        ranked_resumes.extend(match_data for match_data in results if match_data is not None)
+
+        return sorted(ranked_resumes, key=lambda x: x.get('match_percentage', 0), reverse=True)
+
+    async def iter_ranked_resumes_with_gemini(self, job_description, resumes, max_concurrency=None):
         """
-        ranked_resumes = []
+        Yield match data for each resume as soon as it is available: cached results first,
+        then Gemini results in completion order. Closing the generator cancels outstanding calls
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        cached, pending = self._split_cached(job_description, resumes)
+
+        async def score(filename, resume_data):
+            async with semaphore:
+                return await self._score_resume(job_description, filename, resume_data)
+
+        tasks = [asyncio.ensure_future(score(filename, resume_data)) for filename, resume_data in pending.items()]
+        try:
+            for match_data in cached:
+                yield match_data
+            for next_result in asyncio.as_completed(tasks):
+                match_data = await next_result
+                if match_data is not None:
+                    yield match_data
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.match_cache.save_async()
+
+    async def _gather_or_cancel(self, coroutines):
+        """
+        asyncio.gather that cancels the remaining calls as soon as one of them raises
+        """
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
 
+    def _split_cached(self, job_description, resumes):
+        """
+        Separate resumes that already have a cached match result from those still needing Gemini
+        Returns (cached match data list, dict of pending resumes)
+        """
+        cached, pending = [], {}
         for filename, resume_data in resumes.items():
-            if 'error' in resume_data:
+            if not resume_data or 'error' in resume_data:
                 continue
+            match_data = self.match_cache.get(job_description, self._convert_resume_to_text(resume_data))
+            if match_data is None:
+                pending[filename] = resume_data
+                continue
+            match_data['filename'] = filename
+            match_data['full_resume'] = resume_data
+            match_data['cache_status'] = 'hit'
+            cached.append(match_data)
+        return cached, pending
+
+    async def _score_resume(self, job_description, filename, resume_data):
+        """
+        Score a single resume against the job description.
+        Returns the match data, or None if Gemini failed for this resume.
+        CircuitOpenError is raised instead: once the breaker is open, every other resume would fail too
+        """
+        resume_text = self._convert_resume_to_text(resume_data)
+
+        prompt = f"""
+        Job Description:
+        {job_description}
+
+        Resume:
+        {resume_text}
+
+        TASK: Evaluate how well this resume matches the job description.
+        REQUIREMENTS:
+        1. Provide a match percentage (0-100%)
+        2. List key matching skills and experiences
+        3. Identify any significant gaps
+        4. Explain your reasoning briefly
+
+        Respond in JSON format:
+        {{
+            "match_percentage": float,
+            "matching_skills": list,
+            "gaps": list,
+            "reasoning": string
+        }}
+        """
+
+        try:
+            response = await self.genai_client.generate_content_async(
+                model='gemini-2.0-flash',
+                contents=[prompt],
+                deadline=GEMINI_RANKING_DEADLINE_SECONDS
+            )
+
+            if not response or not response.text:
+                raise HTTPException(status_code=500, detail="No response from Gemini")
+
+            match_data = json.loads(response.text)
+            self.match_cache.put(job_description, resume_text, match_data)
+
+            match_data['filename'] = filename
+            match_data['full_resume'] = resume_data
+            match_data['cache_status'] = 'miss'
+
+            return match_data
 
-            resume_text = self._convert_resume_to_text(resume_data)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"Error processing {filename}: {e}")
+            return None
 
-            prompt = f"""
-            Job Description:
-            {job_description}
+    async def rank_resumes_with_gemini_batched(self, job_description, resumes, token_budget=None, max_batch_size=None, max_concurrency=None):
+        """
+        Rank resumes with Gemini, packing several resumes into each prompt
+        Batches are sized to fit token_budget so the job description is sent once per batch
+        rather than once per resume. Resumes missing from a batch response are scored individually
+        Cached results are reused, so only new or changed resumes are sent to Gemini
+        """
+        token_budget = token_budget or GEMINI_BATCH_TOKEN_BUDGET
+        max_batch_size = max_batch_size or GEMINI_BATCH_MAX_RESUMES
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        cached, pending = self._split_cached(job_description, resumes)
 
-            Resume:
-            {resume_text}
+        entries = [
+            (filename, resume_data, self._convert_resume_to_text(resume_data))
+            for filename, resume_data in pending.items()
+        ]
+        batches = self._build_batches(job_description, entries, token_budget, max_batch_size)
 
-            TASK: Evaluate how well this resume matches the job description.
-            REQUIREMENTS:
-            1. Provide a match percentage (0-100%)
-            2. List key matching skills and experiences
-            3. Identify any significant gaps
-            4. Explain your reasoning briefly
+        async def score(batch):
+            async with semaphore:
+                return await self._score_batch(job_description, batch)
 
-            Respond in JSON format:
+        async def score_single(filename, resume_data):
+            async with semaphore:
+                return await self._score_resume(job_description, filename, resume_data)
+
+        ranked_resumes = cached
+        try:
+            results = await self._gather_or_cancel(score(batch) for batch in batches)
+
+            for batch, batch_results in zip(batches, results):
+                missing = [(filename, resume_data) for filename, resume_data, _ in batch if filename not in batch_results]
+                ranked_resumes.extend(batch_results.values())
+                if missing:
+                    print(f"Batch response missed {len(missing)} resume(s), scoring them individually")
+                    fallback = await self._gather_or_cancel(
+                        score_single(filename, resume_data)
+                        for filename, resume_data in missing
+                    )
+                    ranked_resumes.extend(match_data for match_data in fallback if match_data is not None)
+        finally:
+            await self.match_cache.save_async()
+
+        return sorted(ranked_resumes, key=lambda x: x.get('match_percentage', 0), reverse=True)
+
+    def _build_batches(self, job_description, entries, token_budget, max_batch_size):
+        """
+        Greedily pack (filename, resume_data, resume_text) entries into batches within the token budget
+        """
+        overhead = self._estimate_tokens(job_description) + BATCH_PROMPT_OVERHEAD_TOKENS
+        batches, current, used = [], [], overhead
+
+        for entry in entries:
+            cost = self._estimate_tokens(entry[2]) + BATCH_PER_RESUME_OVERHEAD_TOKENS
+            if current and (used + cost > token_budget or len(current) >= max_batch_size):
+                batches.append(current)
+                current, used = [], overhead
+            current.append(entry)
+            used += cost
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def _estimate_tokens(self, text):
+        """
+        Token count from the shared tiktoken encoder (see services.token_budget)
+        """
+        return count_tokens(text)
+
+    async def _score_batch(self, job_description, batch):
+        """
+        Score a batch of resumes in a single Gemini request.
+        Returns a dict of match data keyed by filename; empty if the request failed
+        """
+        resume_sections = "\n\n".join(
+            f"Resume [{filename}]:\n{resume_text}" for filename, _, resume_text in batch
+        )
+
+        prompt = f"""
+        Job Description:
+        {job_description}
+
+        {resume_sections}
+
+        TASK: Evaluate how well EACH resume above matches the job description.
+        REQUIREMENTS (for every resume):
+        1. Provide a match percentage (0-100%)
+        2. List key matching skills and experiences
+        3. Identify any significant gaps
+        4. Explain your reasoning briefly
+
+        Respond with a JSON array containing one object per resume, using the filename
+        shown in square brackets exactly as given:
+        [
             {{
+                "filename": string,
                 "match_percentage": float,
                 "matching_skills": list,
                 "gaps": list,
                 "reasoning": string
             }}
-            """
+        ]
+        """
 
-            try:
-                response = self.genai_client.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=[prompt]
-                )
+        entries_by_filename = {filename: (resume_data, resume_text) for filename, resume_data, resume_text in batch}
+        batch_results = {}
 
-                if not response or not response.text:
-                    raise HTTPException(status_code=500, detail="No response from Gemini")
+        try:
+            response = await self.genai_client.generate_content_async(
+                model='gemini-2.0-flash',
+                contents=[prompt],
+                deadline=GEMINI_RANKING_DEADLINE_SECONDS
+            )
+
+            if not response or not response.text:
+                raise HTTPException(status_code=500, detail="No response from Gemini")
+
+            parsed = json.loads(response.text)
+            if isinstance(parsed, dict):
+                parsed = parsed.get('results', [])
 
-                match_data = json.loads(response.text)
-                
-                match_data['filename'] = filename
+            for match_data in parsed:
+                filename = match_data.get('filename') if isinstance(match_data, dict) else None
+                if filename not in entries_by_filename:
+                    continue
+                resume_data, resume_text = entries_by_filename[filename]
+                self.match_cache.put(job_description, resume_text, match_data)
                 match_data['full_resume'] = resume_data
-                
-                ranked_resumes.append(match_data)
+                match_data['cache_status'] = 'miss'
+                batch_results[filename] = match_data
 
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            print(f"Error processing batch of {len(batch)} resumes: {e}")
+
+        return batch_results
 
-        return sorted(ranked_resumes, key=lambda x: x.get('match_percentage', 0), reverse=True)
     def _convert_resume_to_text(self, resume_data):
-        if resume_data is None:
-            return ""
-
-        text_parts = []
-
-        # Contact Info
-        contact_info = resume_data.get('contact_info', {})
-        text_parts.append(f"Name: {contact_info.get('full_name', 'N/A')}")
-        text_parts.append(f"Email: {contact_info.get('email', 'N/A')}")
-        text_parts.append(f"Location: {contact_info.get('location', 'N/A')}")
-
-        text_parts.append("Education:")
-        for edu in resume_data.get('education', []):
-            text_parts.append(f"- {edu.get('degree', 'N/A')} from {edu.get('institution', 'N/A')}")
-
-        text_parts.append("Work Experience:")
-        for exp in resume_data.get('work_experience', []):
-            text_parts.append(f"- {exp.get('job_title', 'N/A')} at {exp.get('company', 'N/A')}")
-            for responsibility in exp.get('responsibilities', []):
-                text_parts.append(f"  * {responsibility}")
-
-        skills = resume_data.get('skills', {})
-        technical_skills = skills.get('technical_skills', [])
-        if technical_skills:
-            text_parts.append("Technical Skills:")
-            text_parts.extend([f"- {skill}" for skill in technical_skills])
-
-        soft_skills = skills.get('soft_skills')
-        if soft_skills:
-            if isinstance(soft_skills, list):
-                text_parts.append("Soft Skills: " + ", ".join(soft_skills))
-            elif isinstance(soft_skills, str):
-                text_parts.append(f"Soft Skills: {soft_skills}")
-
-        certifications = skills.get('certifications', [])
-        if certifications:
-            text_parts.append("Certifications:")
-            text_parts.extend([f"- {cert}" for cert in certifications])
-
-        projects = resume_data.get('projects', [])
-        if projects:
-            text_parts.append("Projects:")
-            for project in projects:
-                text_parts.append(f"- {project.get('name', 'N/A')}")
-                text_parts.append(f"  Description: {project.get('description', 'N/A')}")
-
-        return " ".join(text_parts)
-
-    def rank_resumes_with_cosine_similarity(self, job_description, resumes):
+        return convert_resume_to_text(resume_data)
+
+    async def rank_resumes_two_stage(self, job_description, resumes, top_k, min_score=0.0, index=None, batched=False):
+        """
+        Two-stage ranking: the TF-IDF index retrieves the top_k resumes scoring at least min_score,
+        and only that shortlist is reranked by Gemini. Each result carries its retrieval_score
+        """
+        candidates, retrieval_scores = self.retrieve_candidates(job_description, resumes, top_k, min_score, index=index)
+
+        if batched:
+            ranked_resumes = await self.rank_resumes_with_gemini_batched(job_description, candidates)
+        else:
+            ranked_resumes = await self.rank_resumes_with_gemini(job_description, candidates)
+
+        for match_data in ranked_resumes:
+            match_data['retrieval_score'] = retrieval_scores[match_data['filename']]
+        return ranked_resumes
+
+    def retrieve_candidates(self, job_description, resumes, top_k, min_score=0.0, index=None):
+        """
+        First stage of two-stage ranking: the top_k resumes by TF-IDF score that reach min_score
+        Returns (dict of candidate resumes, dict of retrieval scores by filename)
+        """
+        shortlist = self.rank_resumes_with_cosine_similarity(job_description, resumes, index=index, top_k=top_k)
+        retrieval_scores = {filename: score for filename, score in shortlist if score >= min_score}
+        candidates = {filename: resumes[filename] for filename in retrieval_scores}
+        return candidates, retrieval_scores
+
+    def rank_resumes_with_cosine_similarity(self, job_description, resumes, index=None, top_k=None):
         """
         Fallback ranking method using cosine similarity
+        Uses the persistent TF-IDF index when given, otherwise indexes the resumes on the fly
         """
-        resume_texts = [
-            self._convert_resume_to_text(resume_data) 
-            for resume_data in resumes.values() 
-            if 'error' not in resume_data
+        if index is None:
+            index = ResumeTfidfIndex()
+            index.sync(resumes)
+
+        resume_ids = [
+            filename for filename, resume_data in resumes.items()
+            if resume_data and 'error' not in resume_data
         ]
+        return index.query(job_description, top_k=top_k, resume_ids=resume_ids)
 
-        documents = [job_description] + resume_texts
-        vectorizer = TfidfVectorizer().fit_transform(documents)
-        vectors = vectorizer.toarray() # type: ignore
+    def match_jobs_with_cosine_similarity(self, job_descriptions, resumes, index=None, top_k=10):
+        """
+        Many-to-many matching: scores every job description against every resume in one sparse
+        matrix multiply over the TF-IDF index. Returns the resume IDs (matrix columns), the
+        jobs x resumes score matrix and the top_k (filename, score) pairs per job
+        """
+        if index is None:
+            index = ResumeTfidfIndex()
+            index.sync(resumes)
+
+        resume_ids = [
+            filename for filename, resume_data in resumes.items()
+            if resume_data and 'error' not in resume_data
+        ]
+        resume_ids, scores = index.query_many(job_descriptions, resume_ids=resume_ids)
 
-        job_description_vector = np.array(vectors[0])
-        resume_vectors = vectors[1:]
-        cosine_similarities = cosine_similarity([job_description_vector], resume_vectors).flatten() # type: ignore
+        top_matches = []
+        for job_scores in scores:
+            k = min(top_k, len(job_scores))
+            best = np.argpartition(-job_scores, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+            best = best[np.argsort(-job_scores[best], kind='stable')]
+            top_matches.append([(resume_ids[i], float(job_scores[i])) for i in best])
 
-        ranked_resumes = list(zip(list(resumes.keys())[1:], cosine_similarities))
-        return sorted(ranked_resumes, key=lambda x: x[1], reverse=True)
\ No newline at end of file
+        return resume_ids, scores, top_matches
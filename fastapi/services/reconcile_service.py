@@ -0,0 +1,150 @@
+"""
+Reconciles the resume analysis results with the PDFs in the upload directory.
+
+Run from the fastapi directory:
+
+    python -m services.reconcile_service
+    python -m services.reconcile_service --force --prune
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from services.resume_service import ResumeService
+from services.resume_extraction_service import ResumeExtractionService
+from utils.file_stat import hash_file
+from config.settings import RESUME_MANIFEST_FILE, RESUME_EXTRACTION_CONCURRENCY
+
+class ResumeReconciler:
+    """
+    Brings the stored results in line with the upload directory without re-uploading anything.
+
+    A manifest records (mtime, size, sha256) for every file already reconciled. Files whose mtime and
+    size are unchanged are skipped without being read, touched files whose hash is unchanged only get
+    their manifest entry refreshed, and new or changed PDFs are analyzed in parallel.
+
+    Pruning is opt-in and only removes results of files the manifest knows came from the directory, so
+    results that never had a file there (e.g. migrated from the JSON results file) are kept. It is
+    skipped entirely when the directory is missing or empty, which usually means a fresh deploy.
+    """
+    def __init__(self, upload_directory='uploaded_resumes', resume_service=None, extractor=None,
+                 manifest_file=RESUME_MANIFEST_FILE, concurrency=RESUME_EXTRACTION_CONCURRENCY):
+        self.upload_directory = os.path.abspath(upload_directory)
+        self.resume_service = resume_service or ResumeService()
+        self.extractor = extractor or ResumeExtractionService()
+        self.manifest_file = manifest_file
+        self.concurrency = concurrency
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Warning: {self.manifest_file} is corrupted. Rebuilding it from the upload directory.")
+            return {}
+
+    def save_manifest(self, manifest):
+        temp_file = f"{self.manifest_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_file, self.manifest_file)
+
+    def list_resume_files(self):
+        """
+        filename -> os.stat_result for every PDF in the upload directory
+        """
+        if not os.path.isdir(self.upload_directory):
+            return {}
+        files = {}
+        with os.scandir(self.upload_directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith('.pdf'):
+                    files[entry.name] = entry.stat()
+        return files
+
+    async def reconcile(self, force=False, prune=False):
+        """
+        Analyze new and changed files, optionally prune results of removed ones, and return a summary.
+        force re-analyzes every file, bypassing the manifest and the extraction hash index
+        """
+        started = time.perf_counter()
+        previous_manifest = self.load_manifest()
+        manifest = {} if force else dict(previous_manifest)
+        files = self.list_resume_files()
+        stored = set(self.resume_service.store.ids())
+        summary = {"scanned": len(files), "unchanged": 0, "analyzed": 0, "failed": 0, "pruned": 0}
+
+        candidates = []
+        for filename, stat in files.items():
+            entry = manifest.get(filename)
+            if (entry and filename in stored
+                    and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size):
+                summary["unchanged"] += 1
+            else:
+                candidates.append((filename, stat))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def reconcile_file(filename, stat):
+            async with semaphore:
+                path = os.path.join(self.upload_directory, filename)
+                content_hash = await asyncio.to_thread(hash_file, path)
+                entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": content_hash}
+                previous = manifest.get(filename)
+                if previous and previous["hash"] == content_hash and filename in stored:
+                    manifest[filename] = entry
+                    summary["unchanged"] += 1
+                    return
+
+                try:
+                    resume_data = await self.extractor.extract_profile(path, content_hash=content_hash, refresh=force)
+                except Exception as e:
+                    print(f"Error reconciling {filename}: {e}")
+                    self.resume_service.update_results(filename, {"error": f"Error processing file: {str(e)}"})
+                    # Left out of the manifest so the next run retries it
+                    manifest.pop(filename, None)
+                    summary["failed"] += 1
+                    return
+                self.resume_service.update_results(filename, resume_data)
+                manifest[filename] = entry
+                summary["analyzed"] += 1
+
+        try:
+            await asyncio.gather(*(reconcile_file(filename, stat) for filename, stat in candidates))
+        finally:
+            if prune and not files:
+                print(f"Warning: {self.upload_directory} is missing or empty, not pruning any results")
+                summary["prune_skipped"] = True
+            elif prune:
+                for filename in (stored & set(previous_manifest)) - set(files):
+                    self.resume_service.delete_results(filename)
+                    summary["pruned"] += 1
+            for filename in set(manifest) - set(files):
+                del manifest[filename]
+            if not (prune and files):
+                # Entries of removed files are kept so a later run with prune can still find their results
+                manifest.update({filename: entry for filename, entry in previous_manifest.items()
+                                 if filename not in files and filename in stored})
+            self.save_manifest(manifest)
+            self.resume_service.flush_indexes()
+
+        summary["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile resume analysis results with the upload directory")
+    parser.add_argument("--upload-directory", default="uploaded_resumes")
+    parser.add_argument("--force", action="store_true", help="Re-analyze every file, e.g. after a schema change")
+    parser.add_argument("--prune", action="store_true", help="Delete results of reconciled files that are gone")
+    parser.add_argument("--concurrency", type=int, default=RESUME_EXTRACTION_CONCURRENCY)
+    args = parser.parse_args()
+
+    reconciler = ResumeReconciler(upload_directory=args.upload_directory, concurrency=args.concurrency)
+    summary = asyncio.run(reconciler.reconcile(force=args.force, prune=args.prune))
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import asyncio
+import copy
+import hashlib
+import json
+import pathlib
+from google.genai import errors
+from models.resume import ResumeProfile
+from services.gemini_service import get_gemini_service
+from services.resume_hash_index import get_resume_hash_index
+from utils.file_stat import hash_file
+from utils.pdf_text import extract_pdf_text
+from config.settings import RESUME_LOCAL_TEXT_EXTRACTION, RESUME_LOCAL_TEXT_MIN_CHARS_PER_PAGE
+
+RESUME_EXTRACTION_PROMPT = """
+Perform a COMPREHENSIVE analysis of this resume.
+CRITICAL INSTRUCTIONS:
+1. Extract EVERY single detail from the document
+2. Do NOT skip or summarize - provide FULL information
+3. If any section is incomplete, explicitly state what's missing
+4. Ensure maximum detail and precision
+
+Extraction Depth:
+- Contact Info: Full details
+- Education: Complete academic history
+- Work Experience: Detailed role descriptions
+- Skills: Exhaustive technical and soft skills
+- Projects: All notable projects
+- Certifications: Complete list
+- Achievements: All awards, publications, etc.
+- Summary: A brief overview of the candidate's profile
+"""
+
+# Identifies the prompt and schema profiles are extracted with, so a change to either invalidates
+# the profiles the hash index remembers for identical bytes
+EXTRACTION_VERSION = hashlib.sha256(
+    (RESUME_EXTRACTION_PROMPT + json.dumps(ResumeProfile.model_json_schema(), sort_keys=True)).encode('utf-8')
+).hexdigest()[:16]
+
+class ResumeExtractionService:
+    """
+    Extracts a structured ResumeProfile from a resume PDF with Gemini.
+    All calls go through the async Gemini client, so extraction never blocks the event loop.
+    """
+    def __init__(self, gemini=None):
+        self.gemini = gemini or get_gemini_service()
+        self.hash_index = get_resume_hash_index()
+        self._in_flight = {}
+
+    async def extract_profile(self, file_path, content_hash=None, refresh=False):
+        """
+        Return the extracted profile of a resume file as a dict.
+        With a content_hash, bytes seen before are answered from the hash index without calling
+        Gemini, and identical files being extracted at the same time share one Gemini call.
+        refresh skips the hash index lookup (e.g. after a prompt or schema change) but still updates it
+        """
+        if content_hash is None:
+            return await self._extract_with_gemini(file_path)
+
+        profile = None if refresh else self.hash_index.get(content_hash, EXTRACTION_VERSION)
+        if profile is not None:
+            return profile
+
+        in_flight = self._in_flight.get(content_hash)
+        if in_flight is not None:
+            return copy.deepcopy(await asyncio.shield(in_flight))
+
+        extraction = asyncio.ensure_future(self._extract_with_gemini(file_path, content_hash))
+        self._in_flight[content_hash] = extraction
+        try:
+            profile = await extraction
+        finally:
+            self._in_flight.pop(content_hash, None)
+
+        if profile:
+            self.hash_index.put(content_hash, pathlib.Path(file_path).name, profile, EXTRACTION_VERSION)
+            await self.hash_index.save_async()
+        return copy.deepcopy(profile)
+
+    async def _extract_with_gemini(self, file_path, content_hash=None):
+        """
+        Return the profile extracted by Gemini as a dict.
+        PDFs with a usable text layer are extracted locally and only their text is sent;
+        scanned or low-text PDFs are uploaded to Gemini as files, reusing an earlier upload of the same bytes
+        """
+        resume_text = await self._local_text(file_path) if RESUME_LOCAL_TEXT_EXTRACTION else None
+
+        if resume_text:
+            response = await self._generate([f"{RESUME_EXTRACTION_PROMPT}\nResume text (extracted from the PDF):\n{resume_text}"])
+        else:
+            sample_file = await self.gemini.upload_file_async(pathlib.Path(file_path), content_hash=content_hash)
+            try:
+                response = await self._generate([sample_file, RESUME_EXTRACTION_PROMPT])
+            except errors.ClientError as e:
+                if e.code not in (403, 404):
+                    raise
+                # The reused remote file is gone (e.g. deleted by hand); forget it and upload it again once
+                print(f"Gemini file {sample_file.name} is no longer available, uploading {file_path} again")
+                content_hash = content_hash or await asyncio.to_thread(hash_file, file_path)
+                self.gemini.forget_uploaded_file(content_hash, sample_file.name)
+                sample_file = await self.gemini.upload_file_async(pathlib.Path(file_path), content_hash=content_hash)
+                response = await self._generate([sample_file, RESUME_EXTRACTION_PROMPT])
+
+        if isinstance(response.parsed, ResumeProfile):
+            return response.parsed.model_dump()
+        return response.parsed
+
+    async def _generate(self, contents):
+        return await self.gemini.generate_content_async(
+            model='gemini-2.0-flash',
+            contents=contents,
+            config={
+                'response_mime_type': 'application/json',
+                'response_schema': ResumeProfile,
+            },
+        )
+
+    async def _local_text(self, file_path):
+        """
+        Text layer of the PDF, or None if it is too thin to rely on (e.g. a scanned resume)
+        """
+        text, page_count = await asyncio.to_thread(extract_pdf_text, file_path)
+        if not page_count or len(text) < RESUME_LOCAL_TEXT_MIN_CHARS_PER_PAGE * page_count:
+            return None
+        return text
@@ -0,0 +1,81 @@
+import asyncio
+import copy
+import json
+import os
+import threading
+from config.settings import RESUME_HASH_INDEX_FILE
+
+class ResumeHashIndex:
+    """
+    Persistent index from the sha256 of an uploaded resume to its extracted profile.
+    Lets a re-uploaded PDF skip Gemini extraction, whatever filename it arrives under. Entries record
+    the extraction version they were produced with, and entries from another version are ignored.
+    put only marks the index dirty; save (or save_async on the event loop) writes it, and saves
+    that overlap collapse into one write.
+    """
+    def __init__(self, index_file=RESUME_HASH_INDEX_FILE):
+        self.index_file = index_file
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.entries = self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Warning: {self.index_file} is corrupted. Starting with an empty resume hash index.")
+            return {}
+
+    def save(self):
+        """
+        Write the index to disk if anything changed since the last save
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = dict(self.entries)
+                self._dirty = False
+            try:
+                temp_file = f"{self.index_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(temp_file, self.index_file)
+            except BaseException:
+                self._dirty = True
+                raise
+
+    async def save_async(self):
+        await asyncio.to_thread(self.save)
+
+    def get(self, content_hash, version=None):
+        """
+        Return a copy of the profile extracted from these bytes with this extraction version, or None
+        """
+        with self._lock:
+            entry = self.entries.get(content_hash)
+            if entry is None or entry.get('version') != version:
+                return None
+            return copy.deepcopy(entry['profile'])
+
+    def put(self, content_hash, filename, profile, version=None):
+        with self._lock:
+            self.entries[content_hash] = {"filename": filename, "profile": profile, "version": version}
+            self._dirty = True
+
+_resume_hash_index = None
+_resume_hash_index_lock = threading.Lock()
+
+def get_resume_hash_index():
+    """
+    Return the process-wide resume hash index
+    """
+    global _resume_hash_index
+    with _resume_hash_index_lock:
+        if _resume_hash_index is None:
+            _resume_hash_index = ResumeHashIndex()
+        return _resume_hash_index
@@ -0,0 +1,302 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from utils.resume_text import convert_resume_to_text
+from services.resume_store import get_resume_store
+
+# Same tokenization as a default TfidfVectorizer, so scores stay comparable with the old fallback
+_analyzer = TfidfVectorizer().build_analyzer()
+
+class ResumeTfidfIndex:
+    """
+    Incrementally updatable sparse TF-IDF index over analyzed resumes.
+
+    Raw term counts are kept per resume, so updating one resume only re-tokenizes that resume.
+    IDF weights and document norms are recomputed lazily (O(nnz)) on the next query, and every
+    query is a single sparse matrix-vector product. Weighting matches TfidfVectorizer's defaults
+    (smooth idf, l2 norm) over the indexed resumes.
+
+    Single-resume updates are not written to disk; bulk paths call flush() once when they are done.
+    A persisted index that lags behind the store is re-synced from it on load via its source signature.
+    """
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.vocabulary = {}
+        self.rows = {}
+        self.source_signature = None
+        self.version = 0
+        self._lock = threading.RLock()
+        self._dirty = True
+        self._unsaved = False
+        self._ids = []
+        self._matrix = None
+        self._idf = None
+
+    @classmethod
+    def load(cls, index_file):
+        """
+        Load a persisted index, or return an empty one if the file is missing or unreadable
+        """
+        index = cls(index_file)
+        try:
+            with open(index_file, 'rb') as f:
+                state = pickle.load(f)
+            index.vocabulary = state['vocabulary']
+            index.rows = state['rows']
+            index.source_signature = state['source_signature']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: could not load resume index {index_file}, rebuilding: {e}")
+        return index
+
+    def save(self):
+        """
+        Persist vocabulary and per-resume term counts next to the results file
+        """
+        if not self.index_file:
+            return
+        with self._lock:
+            state = {
+                'vocabulary': self.vocabulary,
+                'rows': self.rows,
+                'source_signature': self.source_signature,
+            }
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, self.index_file)
+            self._unsaved = False
+
+    def flush(self):
+        """
+        Persist the index if it changed since it was last saved
+        """
+        with self._lock:
+            if self._unsaved:
+                self.save()
+
+    def upsert(self, resume_id, resume_data, source_signature=None, save=False):
+        """
+        Add or replace one resume. Error entries and empty profiles are removed from the index
+        """
+        with self._lock:
+            if not resume_data or 'error' in resume_data:
+                self._remove(resume_id)
+            else:
+                self._index_text(resume_id, convert_resume_to_text(resume_data))
+            if source_signature is not None:
+                self.source_signature = source_signature
+            self._unsaved = True
+            if save:
+                self.save()
+
+    def remove(self, resume_id, source_signature=None, save=False):
+        with self._lock:
+            self._remove(resume_id)
+            if source_signature is not None:
+                self.source_signature = source_signature
+            self._unsaved = True
+            if save:
+                self.save()
+
+    def sync(self, resumes, source_signature=None):
+        """
+        Bring the index in line with a full resumes dict.
+        Only resumes whose text changed are re-tokenized; resumes no longer present are dropped
+        """
+        with self._lock:
+            changed = False
+            for resume_id in list(self.rows):
+                if resume_id not in resumes:
+                    changed |= self._remove(resume_id)
+            for resume_id, resume_data in resumes.items():
+                if not resume_data or 'error' in resume_data:
+                    changed |= self._remove(resume_id)
+                else:
+                    changed |= self._index_text(resume_id, convert_resume_to_text(resume_data))
+            self.source_signature = source_signature
+            return changed
+
+    def _index_text(self, resume_id, text):
+        text_hash = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        existing = self.rows.get(resume_id)
+        if existing is not None and existing[0] == text_hash:
+            return False
+
+        counts = Counter(_analyzer(text))
+        term_ids = np.fromiter(
+            (self.vocabulary.setdefault(term, len(self.vocabulary)) for term in counts),
+            dtype=np.int32, count=len(counts)
+        )
+        term_counts = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        self.rows[resume_id] = (text_hash, term_ids, term_counts)
+        self._mark_dirty()
+        return True
+
+    def _remove(self, resume_id):
+        if self.rows.pop(resume_id, None) is None:
+            return False
+        self._mark_dirty()
+        return True
+
+    def _mark_dirty(self):
+        self._dirty = True
+        self.version += 1
+
+    def _refresh(self):
+        """
+        Rebuild the normalized TF-IDF matrix from the stored term counts if anything changed
+        """
+        if not self._dirty:
+            return
+        ids = list(self.rows)
+        n_terms = len(self.vocabulary)
+        lengths = [len(self.rows[resume_id][1]) for resume_id in ids]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        if ids:
+            indices = np.concatenate([self.rows[resume_id][1] for resume_id in ids])
+            data = np.concatenate([self.rows[resume_id][2] for resume_id in ids])
+        else:
+            indices = np.zeros(0, dtype=np.int32)
+            data = np.zeros(0, dtype=np.float32)
+        counts = sparse.csr_matrix((data, indices, indptr), shape=(len(ids), n_terms))
+
+        document_frequency = np.bincount(indices, minlength=n_terms)
+        idf = (np.log((1 + len(ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        weighted = counts.multiply(idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        weighted = sparse.diags(1 / norms) @ weighted
+
+        self._ids = ids
+        self._matrix = weighted.tocsr().astype(np.float32)
+        self._idf = idf
+        self._dirty = False
+
+    def _query_vector(self, text):
+        """
+        Dense l2-normalized TF-IDF vector for a query. Terms unknown to the index still count
+        towards the norm (with maximal idf), as they would for a vectorizer fit on query + resumes
+        """
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        unknown_idf = np.log(1 + len(self._ids)) + 1
+        unknown_norm = 0.0
+        for term, count in Counter(_analyzer(text)).items():
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                unknown_norm += (count * unknown_idf) ** 2
+            else:
+                vector[term_id] = count * self._idf[term_id]
+        norm = np.sqrt(float(vector @ vector) + unknown_norm)
+        if norm:
+            vector /= norm
+        return vector
+
+    def query(self, text, top_k=None, resume_ids=None):
+        """
+        Score every indexed resume against text with one sparse mat-vec.
+        Returns (resume_id, score) pairs sorted by descending score, optionally limited
+        to resume_ids and to the top_k best matches
+        """
+        with self._lock:
+            self._refresh()
+            if not self._ids:
+                return []
+            scores = self._matrix @ self._query_vector(text)
+            ids = self._ids
+
+        candidates = np.arange(len(ids))
+        if resume_ids is not None:
+            allowed = set(resume_ids)
+            candidates = np.array([i for i, resume_id in enumerate(ids) if resume_id in allowed], dtype=np.int64)
+            if not len(candidates):
+                return []
+        if top_k is not None and top_k < len(candidates):
+            best = np.argpartition(-scores[candidates], top_k - 1)[:top_k]
+            candidates = candidates[best]
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [(ids[i], float(scores[i])) for i in order]
+
+    def _query_matrix(self, texts):
+        """
+        Sparse (len(texts) x vocabulary) matrix of l2-normalized query vectors, one row per text,
+        with the same unknown-term handling as _query_vector
+        """
+        unknown_idf = np.log(1 + len(self._ids)) + 1
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            row_indices, row_data, unknown_norm = [], [], 0.0
+            for term, count in Counter(_analyzer(text)).items():
+                term_id = self.vocabulary.get(term)
+                if term_id is None:
+                    unknown_norm += (count * unknown_idf) ** 2
+                else:
+                    row_indices.append(term_id)
+                    row_data.append(count * self._idf[term_id])
+            row_data = np.asarray(row_data, dtype=np.float32)
+            norm = np.sqrt(float(row_data @ row_data) + unknown_norm)
+            if norm:
+                row_data /= norm
+            indices.extend(row_indices)
+            data.extend(row_data)
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+            shape=(len(texts), len(self.vocabulary))
+        )
+
+    def query_many(self, texts, resume_ids=None):
+        """
+        Score every text against every indexed resume with a single sparse matrix product.
+        Returns (resume IDs, dense len(texts) x len(resume IDs) score matrix), optionally
+        restricted to resume_ids
+        """
+        with self._lock:
+            self._refresh()
+            ids = self._ids
+            if not ids:
+                return [], np.zeros((len(texts), 0), dtype=np.float32)
+            scores = (self._query_matrix(texts) @ self._matrix.T).toarray()
+
+        if resume_ids is not None:
+            allowed = set(resume_ids)
+            columns = [i for i, resume_id in enumerate(ids) if resume_id in allowed]
+            ids = [ids[i] for i in columns]
+            scores = scores[:, columns]
+        return ids, scores
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_resume_index(results_file='resume_analysis_results.json'):
+    """
+    Return the process-wide TF-IDF index for results_file.
+    The index is loaded from disk on first use and re-synced whenever the resume store changed
+    behind its back; writes made through ResumeService keep it current without a re-sync.
+    """
+    results_path = os.path.abspath(results_file)
+    with _indexes_lock:
+        index = _indexes.get(results_path)
+        if index is None:
+            index = ResumeTfidfIndex.load(os.path.splitext(results_path)[0] + '.tfidf.pkl')
+            _indexes[results_path] = index
+
+    sync_index_with_store(index, get_resume_store(results_file))
+    return index
+
+def sync_index_with_store(index, store):
+    """
+    Re-sync an index from the resume store if the store was written since the index last saw it
+    """
+    with index._lock:
+        signature = store.signature()
+        if index.source_signature != signature:
+            index.sync(store.all(), source_signature=signature)
+            index.save()
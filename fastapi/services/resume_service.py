@@ -1,35 +1,74 @@
-import json
+import os
+from services.resume_index import get_resume_index
+from services.facet_index import get_facet_index
+from services.resume_store import get_resume_store
+from services.skill_taxonomy import add_canonical_skills, get_skill_taxonomy
 
 class ResumeService:
     """
-    Service for analyzing resumes and storing results in a JSON file.
-    This service handles loading, saving, and updating resume analysis results.
+    Service for storing resume analysis results.
+    Results are kept in the resume store for results_file (SQLite by default, see RESUME_STORE_BACKEND),
+    so saving one resume writes one row instead of the whole result set.
     """
     def __init__(self, results_file='resume_analysis_results.json'):
         self.results_file = results_file
-        self.analysis_results = {}
-        self.load_results()
-    
-    def load_results(self):
+        self.store = get_resume_store(results_file)
+
+    def is_results_file(self, path):
+        """
+        Whether path names this service's results file, i.e. whether its store and indexes may be used for it
+        """
+        return os.path.abspath(path) == os.path.abspath(self.results_file)
+
+    def all_results(self):
+        """
+        All analysis results as a dict of filename -> profile. Reads the whole store, so only for callers
+        that really return everything; others should use get_results, iter_results or store.page/ids
+        """
+        return self.store.all()
+
+    def iter_results(self, batch_size=500):
         """
-        Load existing results from JSON file or create a new empty dictionary
+        Yield (filename, profile) for every result, reading the store one page at a time
         """
-        try:
-            with open(self.results_file, 'r') as f:
-                self.analysis_results = json.load(f)
-        except FileNotFoundError:
-            self.analysis_results = {}
+        cursor = None
+        while True:
+            rows, cursor = self.store.page(limit=batch_size, cursor=cursor)
+            yield from rows
+            if cursor is None:
+                return
 
-    def save_results(self):
+    def get_results(self, filenames):
         """
-        Save current analysis results to JSON file
+        Analysis results for the given filenames only, as a dict
         """
-        with open(self.results_file, 'w') as f:
-            json.dump(self.analysis_results, f, indent=2)
+        return self.store.get_many(filenames)
 
     def update_results(self, filename, resume_data):
         """
-        Update results dictionary and save to file
+        Save one resume's results to the store and return the profile as stored.
+        Skills and technologies are mapped to the canonical skill taxonomy on the way in (kept next to
+        the raw lists), and the TF-IDF ranking index and the facet filter index are kept in step
+        """
+        resume_data = add_canonical_skills(resume_data)
+        get_skill_taxonomy().save()
+        indexes = [get_resume_index(self.results_file), get_facet_index(self.results_file)]
+        signature = self.store.put(filename, resume_data)
+        for index in indexes:
+            index.upsert(filename, resume_data, source_signature=signature)
+        return resume_data
+
+    def flush_indexes(self):
+        """
+        Persist the ranking index once after a batch of update_results/delete_results calls
+        """
+        get_resume_index(self.results_file).flush()
+
+    def delete_results(self, filename):
+        """
+        Remove one resume's results from the store and from the ranking and facet indexes
         """
-        self.analysis_results[filename] = resume_data
-        self.save_results()
\ No newline at end of file
+        indexes = [get_resume_index(self.results_file), get_facet_index(self.results_file)]
+        signature = self.store.delete(filename)
+        for index in indexes:
+            index.remove(filename, source_signature=signature)
@@ -0,0 +1,353 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from config.settings import RESUME_STORE_BACKEND
+from services.skill_taxonomy import add_canonical_skills, get_skill_taxonomy
+from utils.file_stat import file_signature
+
+# Sort orders supported by page(), as SQL expressions over the resumes table
+RESUME_SORT_KEYS = {
+    "filename": "id",
+    "full_name": "COALESCE(json_extract(data, '$.contact_info.full_name'), '')",
+    "updated_at": "updated_at",
+}
+
+def get_field(resume_data, path):
+    """
+    Value at a dotted path such as 'contact_info.full_name', or None if any part is missing
+    """
+    value = resume_data
+    for part in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+def project_fields(values):
+    """
+    Nest a dict of dotted path -> value back into the shape of a resume profile
+    """
+    projected = {}
+    for path, value in values.items():
+        target = projected
+        *parents, leaf = path.split('.')
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return projected
+
+class JsonResumeStore:
+    """
+    The original storage layout: every resume in one JSON file, rewritten in full on every write.
+    Kept for deployments that read the results file directly.
+    """
+    def __init__(self, results_file):
+        self.results_file = results_file
+        self._lock = threading.RLock()
+        self._resumes = {}
+        self._signature = None
+
+    def _load(self):
+        signature = file_signature(self.results_file)
+        if signature != self._signature:
+            try:
+                with open(self.results_file, 'r') as f:
+                    self._resumes = json.load(f)
+            except FileNotFoundError:
+                self._resumes = {}
+            self._signature = signature
+        return self._resumes
+
+    def _save(self):
+        with open(self.results_file, 'w') as f:
+            json.dump(self._resumes, f, indent=2)
+        self._signature = file_signature(self.results_file)
+        return self._signature
+
+    def signature(self):
+        return file_signature(self.results_file)
+
+    def get(self, resume_id):
+        with self._lock:
+            return self._load().get(resume_id)
+
+    def get_many(self, resume_ids):
+        with self._lock:
+            resumes = self._load()
+            return {resume_id: resumes[resume_id] for resume_id in resume_ids if resume_id in resumes}
+
+    def all(self):
+        with self._lock:
+            return dict(self._load())
+
+    def count(self):
+        with self._lock:
+            return len(self._load())
+
+    def ids(self):
+        with self._lock:
+            return list(self._load())
+
+    def page(self, limit=100, cursor=None, sort='filename', descending=False, fields=None):
+        """
+        Same contract as SqliteResumeStore.page; updated_at sorts by position in the file
+        """
+        with self._lock:
+            resumes = self._load()
+            if sort == 'full_name':
+                keyed = [(str(get_field(data, 'contact_info.full_name') or ''), resume_id) for resume_id, data in resumes.items()]
+            elif sort == 'updated_at':
+                keyed = [(position, resume_id) for position, resume_id in enumerate(resumes)]
+            else:
+                keyed = [(resume_id, resume_id) for resume_id in resumes]
+            keyed.sort(reverse=descending)
+            if cursor is not None:
+                cursor = tuple(cursor)
+                keyed = [key for key in keyed if (key < cursor if descending else key > cursor)]
+            page = keyed[:limit]
+            rows = [
+                (resume_id, project_fields({field: get_field(resumes[resume_id], field) for field in fields})
+                 if fields else resumes[resume_id])
+                for _, resume_id in page
+            ]
+        next_cursor = list(page[-1]) if len(keyed) > limit else None
+        return rows, next_cursor
+
+    def put(self, resume_id, resume_data):
+        with self._lock:
+            self._load()[resume_id] = resume_data
+            return self._save()
+
+    def delete(self, resume_id):
+        with self._lock:
+            self._load().pop(resume_id, None)
+            return self._save()
+
+    def replace_all(self, resumes):
+        with self._lock:
+            self._resumes = dict(resumes)
+            return self._save()
+
+class SqliteResumeStore:
+    """
+    One row per resume in an SQLite database in WAL mode, with the profile stored as a JSON column.
+    Upserts and point lookups touch a single row, pages are read through indexed sort keys, and each write
+    is its own transaction, so a crash can no longer corrupt the whole store. Every write also bumps
+    a version counter in the same transaction, which derived indexes use to detect that they are stale.
+    """
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL CHECK (json_valid(data)), updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS resumes_full_name ON resumes ({RESUME_SORT_KEYS['full_name']}, id)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS resumes_updated_at ON resumes (updated_at, id)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('store_id', ?)", (uuid.uuid4().hex,))
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', '0')")
+        self.store_id = self.get_meta('store_id')
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _bump_version(self, conn):
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+
+    def get_meta(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, str(value)))
+
+    def signature(self):
+        """
+        (store id, version): changes on every write, and differs between two databases at the same path
+        """
+        return (self.store_id, int(self.get_meta('version')))
+
+    def get(self, resume_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM resumes WHERE id = ?", (resume_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, resume_ids):
+        resume_ids = list(resume_ids)
+        resumes = {}
+        # Stay well below SQLite's bound parameter limit
+        for start in range(0, len(resume_ids), 500):
+            chunk = resume_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM resumes WHERE id IN ({placeholders})", chunk
+                ).fetchall()
+            resumes.update((resume_id, json.loads(data)) for resume_id, data in rows)
+        return resumes
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, data FROM resumes ORDER BY rowid").fetchall()
+        return {resume_id: json.loads(data) for resume_id, data in rows}
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    def ids(self):
+        with self._lock:
+            return [resume_id for resume_id, in self._conn.execute("SELECT id FROM resumes")]
+
+    def page(self, limit=100, cursor=None, sort='filename', descending=False, fields=None):
+        """
+        One page of resumes in sort order (see RESUME_SORT_KEYS), starting after cursor.
+        With fields (dotted paths), only those values are extracted from the JSON column.
+        Returns (rows, next cursor): rows are (resume_id, profile) pairs and the cursor is the
+        [sort key, resume_id] of the last row, or None on the last page
+        """
+        key = RESUME_SORT_KEYS[sort]
+        direction, compare = ("DESC", "<") if descending else ("ASC", ">")
+        params = []
+        if fields:
+            select = "json_object(" + ", ".join(f"'{i}', json_extract(data, ?)" for i in range(len(fields))) + ")"
+            params.extend(f"$.{field}" for field in fields)
+        else:
+            select = "data"
+        sql = f"SELECT id, {key}, {select} FROM resumes"
+        if cursor is not None:
+            sql += f" WHERE ({key} {compare} ? OR ({key} = ? AND id {compare} ?))"
+            params.extend([cursor[0], cursor[0], cursor[1]])
+        sql += f" ORDER BY {key} {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = [rows[limit - 1][1], rows[limit - 1][0]] if len(rows) > limit else None
+        page = []
+        for resume_id, _, data in rows[:limit]:
+            data = json.loads(data)
+            if fields:
+                data = project_fields({field: data[str(i)] for i, field in enumerate(fields)})
+            page.append((resume_id, data))
+        return page, next_cursor
+
+    def put(self, resume_id, resume_data):
+        """
+        Insert or replace one resume. Returns the new store signature
+        """
+        data = json.dumps(resume_data)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO resumes (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (resume_id, data, time.time())
+            )
+            self._bump_version(conn)
+            return self.signature()
+
+    def delete(self, resume_id):
+        with self._transaction() as conn:
+            if conn.execute("DELETE FROM resumes WHERE id = ?", (resume_id,)).rowcount:
+                self._bump_version(conn)
+            return self.signature()
+
+    def replace_all(self, resumes):
+        """
+        Replace the whole contents of the store in one transaction
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM resumes")
+            conn.executemany(
+                "INSERT INTO resumes (id, data, updated_at) VALUES (?, ?, ?)",
+                ((resume_id, json.dumps(resume_data), now) for resume_id, resume_data in resumes.items())
+            )
+            self._bump_version(conn)
+            return self.signature()
+
+def migrate_json_results(results_file, store):
+    """
+    One-shot import of an existing JSON results file into a fresh store.
+    The JSON file is left in place as a backup; the migration is recorded so it never runs twice
+    """
+    if store.get_meta('migrated_from') is not None or store.count():
+        return False
+    try:
+        with open(results_file, 'r') as f:
+            resumes = json.load(f)
+    except FileNotFoundError:
+        return False
+    store.replace_all(resumes)
+    store.set_meta('migrated_from', os.path.abspath(results_file))
+    print(f"Migrated {len(resumes)} resumes from {results_file} to {store.db_file}")
+    return True
+
+def backfill_canonical_skills(store):
+    """
+    One-shot pass adding 'canonical_skills' to profiles stored before skill normalization, so read
+    paths never have to canonicalize (and learn skills) on the fly. Recorded in the SQLite store's meta
+    so it never scans again; the JSON store is already in memory, so it just checks on every start
+    """
+    if isinstance(store, SqliteResumeStore) and store.get_meta('canonical_skills_backfilled') is not None:
+        return 0
+    missing = {
+        resume_id: resume_data for resume_id, resume_data in store.all().items()
+        if resume_data and 'error' not in resume_data and 'canonical_skills' not in resume_data
+    }
+    for resume_id, resume_data in missing.items():
+        store.put(resume_id, add_canonical_skills(resume_data))
+    if missing:
+        get_skill_taxonomy().save()
+        print(f"Added canonical skills to {len(missing)} stored resumes")
+    if isinstance(store, SqliteResumeStore):
+        store.set_meta('canonical_skills_backfilled', int(time.time()))
+    return len(missing)
+
+def resume_store_path(results_file):
+    return os.path.splitext(os.path.abspath(results_file))[0] + '.db'
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_resume_store(results_file='resume_analysis_results.json'):
+    """
+    Return the process-wide resume store for results_file, using the backend from RESUME_STORE_BACKEND.
+    The SQLite store lives next to results_file (same name, .db) and imports the JSON file on first use.
+    Only for the server's own results files; never pass a path taken from a request
+    """
+    results_path = os.path.abspath(results_file)
+    with _stores_lock:
+        store = _stores.get(results_path)
+        if store is not None:
+            return store
+
+        if RESUME_STORE_BACKEND == "json":
+            store = JsonResumeStore(results_path)
+        else:
+            store = SqliteResumeStore(resume_store_path(results_path))
+            migrate_json_results(results_path, store)
+        backfill_canonical_skills(store)
+        _stores[results_path] = store
+        return store
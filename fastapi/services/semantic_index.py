@@ -0,0 +1,144 @@
+import os
+import threading
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from services.resume_index import get_resume_index
+from config.settings import SEMANTIC_INDEX_DIMENSIONS, SEMANTIC_ANN_MIN_RESUMES, SEMANTIC_ANN_PROBES, SEMANTIC_REFIT_FRACTION
+
+class ResumeSemanticIndex:
+    """
+    Dense semantic search over analyzed resumes, built locally from the TF-IDF index with LSA.
+
+    TruncatedSVD projects the TF-IDF rows into a small float32 embedding matrix (unit-length rows).
+    Large corpora additionally get an inverted-file ANN index: k-means centroids over the embeddings,
+    of which only the n_probe closest lists are scanned per query. Resumes added after the SVD fit
+    are folded into the existing basis; the basis is refit once enough of the corpus has changed.
+    Everything runs on CPU without network access.
+    """
+    def __init__(self, tfidf_index, dimensions=SEMANTIC_INDEX_DIMENSIONS):
+        self.tfidf_index = tfidf_index
+        self.dimensions = dimensions
+        self._lock = threading.Lock()
+        self._svd = None
+        self._fitted_terms = 0
+        self._fitted_docs = 0
+        self._fitted_version = None
+        self._built_version = None
+        self._ids = []
+        self.embeddings = None
+        self._centroids = None
+        self._list_order = None
+        self._list_offsets = None
+
+    def _refresh(self):
+        """
+        Bring embeddings in line with the TF-IDF index: refit the SVD if too much changed, otherwise
+        re-project the current rows onto the existing basis
+        """
+        tfidf = self.tfidf_index
+        with tfidf._lock:
+            tfidf._refresh()
+            version, ids, matrix = tfidf.version, tfidf._ids, tfidf._matrix
+        if version == self._built_version:
+            return
+
+        changes = version - self._fitted_version if self._fitted_version is not None else None
+        refit = self._svd is None or changes > SEMANTIC_REFIT_FRACTION * max(self._fitted_docs, 1)
+        if refit:
+            self._fit(matrix, len(ids), version)
+
+        if self._svd is None:
+            self.embeddings = None
+        else:
+            embeddings = (matrix[:, :self._fitted_terms] @ self._svd.components_.T).astype(np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self.embeddings = embeddings / norms
+            self._build_ann(recluster=refit or self._centroids is None)
+        self._ids = ids
+        self._built_version = version
+
+    def _fit(self, matrix, n_docs, version):
+        components = min(self.dimensions, n_docs - 1, matrix.shape[1] - 1)
+        self._fitted_version = version
+        self._fitted_docs = n_docs
+        if components < 2:
+            self._svd = None
+            return
+        svd = TruncatedSVD(n_components=components, algorithm='randomized', random_state=0)
+        svd.fit(matrix)
+        svd.components_ = svd.components_.astype(np.float32)
+        self._svd = svd
+        self._fitted_terms = matrix.shape[1]
+
+    def _build_ann(self, recluster):
+        """
+        Cluster the embeddings into about sqrt(n) inverted lists; small corpora are scanned exactly.
+        Without recluster, rows are only reassigned to the existing centroids
+        """
+        n_docs = len(self.embeddings)
+        if n_docs < SEMANTIC_ANN_MIN_RESUMES:
+            self._centroids = None
+            return
+        if recluster:
+            n_lists = int(np.sqrt(n_docs))
+            kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=0, n_init=1, batch_size=4096)
+            kmeans.fit(self.embeddings)
+            centroids = kmeans.cluster_centers_.astype(np.float32)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self._centroids = centroids / norms
+        n_lists = len(self._centroids)
+        assignments = np.argmax(self.embeddings @ self._centroids.T, axis=1)
+        self._list_order = np.argsort(assignments, kind='stable')
+        self._list_offsets = np.searchsorted(assignments[self._list_order], np.arange(n_lists + 1))
+
+    def search(self, text, top_k=10, n_probe=SEMANTIC_ANN_PROBES):
+        """
+        Return (resume_id, score) pairs for the top_k resumes most similar to text
+        Falls back to plain TF-IDF scores when the corpus is too small for a meaningful SVD
+        """
+        with self._lock:
+            self._refresh()
+            if self.embeddings is None:
+                return self.tfidf_index.query(text, top_k=top_k)
+
+            with self.tfidf_index._lock:
+                query = self.tfidf_index._query_vector(text)[:self._fitted_terms]
+            query = self._svd.components_ @ query
+            norm = np.linalg.norm(query)
+            if not norm:
+                return []
+            query /= norm
+
+            if self._centroids is None:
+                candidates = np.arange(len(self._ids))
+            else:
+                nearest_lists = np.argsort(-(self._centroids @ query))[:n_probe]
+                candidates = np.concatenate([
+                    self._list_order[self._list_offsets[i]:self._list_offsets[i + 1]] for i in nearest_lists
+                ])
+            scores = self.embeddings[candidates] @ query
+            if top_k < len(candidates):
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                best = np.arange(len(candidates))
+            best = best[np.argsort(-scores[best], kind='stable')]
+            return [(self._ids[candidates[i]], float(scores[i])) for i in best]
+
+_semantic_indexes = {}
+_semantic_indexes_lock = threading.Lock()
+
+def get_semantic_index(results_file='resume_analysis_results.json'):
+    """
+    Return the process-wide semantic index layered on the TF-IDF index for results_file
+    """
+    tfidf_index = get_resume_index(results_file)
+    results_path = os.path.abspath(results_file)
+    with _semantic_indexes_lock:
+        index = _semantic_indexes.get(results_path)
+        if index is None or index.tfidf_index is not tfidf_index:
+            index = ResumeSemanticIndex(tfidf_index)
+            _semantic_indexes[results_path] = index
+    return index
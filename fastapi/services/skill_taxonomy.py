@@ -0,0 +1,254 @@
+import difflib
+import json
+import os
+import re
+import threading
+from config.settings import SKILL_TAXONOMY_FILE, SKILL_FUZZY_MATCH_CUTOFF
+
+# Canonical skills as (name, dashboard category, aliases). IDs are positions in this list starting at 1,
+# so new entries must only ever be appended.
+SKILL_ALIASES = [
+    ("Python", "Backend", ["python3", "python 3"]),
+    ("Java", "Backend", ["java 8", "java se", "core java"]),
+    ("JavaScript", "Frontend", ["js", "javascript es6", "es6", "ecmascript"]),
+    ("TypeScript", "Frontend", ["ts"]),
+    ("HTML", "Frontend", ["html5"]),
+    ("CSS", "Frontend", ["css3"]),
+    ("React", "Frontend", ["reactjs", "react.js", "react js"]),
+    ("Next.js", "Frontend", ["nextjs", "next js", "next"]),
+    ("Angular", "Frontend", ["angularjs", "angular.js", "angular js"]),
+    ("Vue.js", "Frontend", ["vue", "vuejs", "vue js"]),
+    ("Redux", "Frontend", ["redux toolkit"]),
+    ("Tailwind CSS", "Frontend", ["tailwind", "tailwindcss"]),
+    ("Bootstrap", "Frontend", []),
+    ("Node.js", "Backend", ["node", "nodejs", "node js"]),
+    ("Express", "Backend", ["express.js", "expressjs", "express js"]),
+    ("Django", "Backend", ["django rest framework", "drf"]),
+    ("Flask", "Backend", []),
+    ("FastAPI", "Backend", ["fast api"]),
+    ("Spring Boot", "Backend", ["spring", "springboot", "spring framework"]),
+    ("C", "Backend", []),
+    ("C++", "Backend", ["cpp"]),
+    ("C#", "Backend", ["csharp", "c sharp"]),
+    (".NET", "Backend", ["dotnet", "asp.net", "net core", ".net core"]),
+    ("Go", "Backend", ["golang"]),
+    ("Rust", "Backend", []),
+    ("PHP", "Backend", []),
+    ("Ruby", "Backend", []),
+    ("Ruby on Rails", "Backend", ["rails", "ror"]),
+    ("Kotlin", "Backend", []),
+    ("Swift", None, []),
+    ("GraphQL", "Backend", []),
+    ("REST APIs", "Backend", ["rest", "rest api", "restful", "restful apis"]),
+    ("SQL", "Database", ["structured query language"]),
+    ("MySQL", "Database", ["my sql"]),
+    ("PostgreSQL", "Database", ["postgres", "postgresql database", "psql"]),
+    ("MongoDB", "Database", ["mongo", "mongo db"]),
+    ("Redis", "Database", []),
+    ("SQLite", "Database", []),
+    ("Firebase", "Database", ["google firebase"]),
+    ("Elasticsearch", "Database", ["elastic search"]),
+    ("Docker", "DevOps", ["docker compose", "docker-compose"]),
+    ("Kubernetes", "DevOps", ["k8s"]),
+    ("AWS", "DevOps", ["amazon web services"]),
+    ("Azure", "DevOps", ["microsoft azure"]),
+    ("Google Cloud", "DevOps", ["gcp", "google cloud platform"]),
+    ("CI/CD", "DevOps", ["cicd", "ci cd"]),
+    ("Jenkins", "DevOps", []),
+    ("GitHub Actions", "DevOps", []),
+    ("Terraform", "DevOps", []),
+    ("Linux", None, []),
+    ("Git", None, ["github", "gitlab"]),
+    ("Machine Learning", None, ["ml"]),
+    ("Deep Learning", None, ["dl"]),
+    ("TensorFlow", None, ["tensor flow"]),
+    ("PyTorch", None, ["torch"]),
+    ("scikit-learn", None, ["sklearn", "scikit learn"]),
+    ("Pandas", None, []),
+    ("NumPy", None, []),
+    ("Natural Language Processing", None, ["nlp"]),
+    ("Computer Vision", None, []),
+    ("Data Analysis", None, ["data analytics"]),
+    ("Power BI", None, ["powerbi"]),
+    ("Tableau", None, []),
+    ("Excel", None, ["ms excel", "microsoft excel"]),
+    ("Figma", "Frontend", []),
+]
+
+# Learned skills (not in SKILL_ALIASES) get IDs from here on, so the built-in table can grow
+LEARNED_SKILL_ID_START = 10000
+
+# Keyword rules for categorizing learned skills, matching the dashboard's original substring buckets
+CATEGORY_KEYWORDS = {
+    "Frontend": ["html", "css", "javascript", "react"],
+    "Backend": ["node", "express", "python", "java", "spring"],
+    "DevOps": ["docker", "kubernetes", "aws", "azure", "ci/cd"],
+    "Database": ["sql", "mysql", "postgres", "mongodb", "redis"],
+}
+
+def skill_key(value):
+    """
+    Matching key for a skill name: lowercase with punctuation and spaces dropped ("React.js" -> "reactjs").
+    '+' and '#' are kept so C, C++ and C# stay distinct
+    """
+    return re.sub(r"[^a-z0-9+#]", "", str(value).lower())
+
+class SkillTaxonomy:
+    """
+    Maps free-text skill and technology names to canonical integer IDs.
+
+    Exact matches go through a precompiled alias table; unknown names are fuzzy-matched against it
+    with difflib, and names that still match nothing become learned skills with their own IDs.
+    Fuzzy matches and learned skills are persisted, so IDs stay stable across restarts. Learning only
+    marks the taxonomy dirty; writers call save once per stored profile rather than once per new skill.
+    """
+    def __init__(self, taxonomy_file=SKILL_TAXONOMY_FILE):
+        self.taxonomy_file = taxonomy_file
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self.names = {}
+        self.categories = {}
+        self._ids_by_key = {}
+        for skill_id, (name, category, aliases) in enumerate(SKILL_ALIASES, start=1):
+            self.names[skill_id] = name
+            self.categories[skill_id] = category
+            for alias in [name] + aliases:
+                self._ids_by_key.setdefault(skill_key(alias), skill_id)
+        self._builtin_keys = list(self._ids_by_key)
+        self._learned = {"aliases": {}, "skills": {}}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.taxonomy_file, 'r') as f:
+                self._learned = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            print(f"Warning: {self.taxonomy_file} is corrupted. Starting without learned skills.")
+            return
+        for skill_id, skill in self._learned["skills"].items():
+            self.names[int(skill_id)] = skill["name"]
+            self.categories[int(skill_id)] = skill["category"]
+        for key, skill_id in self._learned["aliases"].items():
+            self._ids_by_key[key] = skill_id
+
+    def save(self):
+        """
+        Write learned skills and aliases to disk if anything was learned since the last save
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                learned = {"aliases": dict(self._learned["aliases"]), "skills": dict(self._learned["skills"])}
+                self._dirty = False
+            try:
+                temp_file = f"{self.taxonomy_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(learned, f, indent=2)
+                os.replace(temp_file, self.taxonomy_file)
+            except BaseException:
+                self._dirty = True
+                raise
+
+    def lookup(self, raw_name, learn=True):
+        """
+        Canonical ID for a raw skill name, or None if it is empty or matches nothing.
+        With learn, unmatched names become learned skills and fuzzy matches are remembered;
+        without it (e.g. for filter queries) nothing is added to the taxonomy
+        """
+        key = skill_key(raw_name)
+        if not key:
+            return None
+        skill_id = self._ids_by_key.get(key)
+        if skill_id is not None:
+            return skill_id
+
+        with self._lock:
+            skill_id = self._ids_by_key.get(key)
+            if skill_id is not None:
+                return skill_id
+            # Very short names are too ambiguous to fuzzy-match ("go" is not "c")
+            matches = difflib.get_close_matches(key, self._builtin_keys, n=1, cutoff=SKILL_FUZZY_MATCH_CUTOFF) if len(key) > 3 else []
+            if matches:
+                skill_id = self._ids_by_key[matches[0]]
+            elif not learn:
+                return None
+            else:
+                skill_id = LEARNED_SKILL_ID_START + len(self._learned["skills"])
+                name = " ".join(str(raw_name).split())
+                category = next(
+                    (category for category, keywords in CATEGORY_KEYWORDS.items()
+                     if any(keyword in name.lower() for keyword in keywords)),
+                    None
+                )
+                self._learned["skills"][str(skill_id)] = {"name": name, "category": category}
+                self.names[skill_id] = name
+                self.categories[skill_id] = category
+            if learn:
+                self._learned["aliases"][key] = skill_id
+                self._ids_by_key[key] = skill_id
+                self._dirty = True
+            return skill_id
+
+    def name(self, skill_id):
+        return self.names.get(skill_id)
+
+    def category(self, skill_id):
+        return self.categories.get(skill_id)
+
+    def canonicalize(self, raw_names, learn=True):
+        """
+        List of {"id", "name", "raw"} for raw_names, one per canonical skill, in first-seen order.
+        Without learn, names that match nothing are left out instead of becoming learned skills
+        """
+        canonical = {}
+        for raw_name in raw_names or []:
+            skill_id = self.lookup(raw_name, learn=learn)
+            if skill_id is not None and skill_id not in canonical:
+                canonical[skill_id] = {"id": skill_id, "name": self.names[skill_id], "raw": raw_name}
+        return list(canonical.values())
+
+def add_canonical_skills(resume_data, taxonomy=None, learn=True):
+    """
+    Copy of a resume profile with a 'canonical_skills' entry holding the canonical form of its technical
+    skills and of the technologies of its work experience and projects, next to the raw lists.
+    Only write paths should learn; read paths pass learn=False so a GET never changes the taxonomy
+    """
+    if not resume_data or 'error' in resume_data:
+        return resume_data
+    taxonomy = taxonomy or get_skill_taxonomy()
+    technologies = [
+        tech
+        for entry in (resume_data.get('work_experience') or []) + (resume_data.get('projects') or [])
+        for tech in entry.get('technologies') or []
+    ]
+    resume_data = dict(resume_data)
+    resume_data['canonical_skills'] = {
+        "skills": taxonomy.canonicalize((resume_data.get('skills') or {}).get('technical_skills'), learn=learn),
+        "technologies": taxonomy.canonicalize(technologies, learn=learn),
+    }
+    return resume_data
+
+def get_canonical_skills(resume_data):
+    """
+    The 'canonical_skills' entry of a profile. Stored profiles get it on write or from the one-time
+    backfill in get_resume_store; anything else is canonicalized on the fly without learning
+    """
+    canonical = (resume_data or {}).get('canonical_skills')
+    if canonical is None:
+        canonical = (add_canonical_skills(resume_data, learn=False) or {}).get('canonical_skills') or {"skills": [], "technologies": []}
+    return canonical
+
+_skill_taxonomy = None
+
+def get_skill_taxonomy():
+    """
+    Return the process-wide skill taxonomy
+    """
+    global _skill_taxonomy
+    if _skill_taxonomy is None:
+        _skill_taxonomy = SkillTaxonomy()
+    return _skill_taxonomy
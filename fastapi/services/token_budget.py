@@ -0,0 +1,182 @@
+import copy
+import functools
+import tiktoken
+from utils.text_compression import compress_text
+
+# Sections that would keep fewer tokens than this after truncation are dropped instead
+MIN_TRUNCATED_SECTION_TOKENS = 50
+TRUNCATION_MARKER = "\n[... truncated to fit the token budget ...]"
+
+@functools.lru_cache(maxsize=None)
+def get_encoder(encoding_name="cl100k_base"):
+    """
+    Process-wide tiktoken encoder, or None if it cannot be loaded (e.g. offline without a cached encoding)
+    """
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        print(f"Warning: could not load the {encoding_name} encoding, estimating token counts instead. Error: {e}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def get_stop_words():
+    """
+    NLTK English stopwords if they are already available locally, otherwise an empty set
+    """
+    try:
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words("english"))
+    except Exception:
+        return frozenset()
+
+def estimate_tokens(text):
+    """
+    Rough token estimate (about four characters per token)
+    """
+    return len(text) // 4 + 1
+
+def count_tokens(text):
+    encoder = get_encoder()
+    if encoder is None:
+        return estimate_tokens(text)
+    return len(encoder.encode(text, disallowed_special=()))
+
+def truncate_tokens(text, max_tokens):
+    encoder = get_encoder()
+    if encoder is None:
+        return text[:max_tokens * 4]
+    return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+
+def drop_fields(data, paths):
+    """
+    Copy of data without the given dotted paths; paths through lists apply to every element
+    """
+    data = copy.deepcopy(data)
+
+    def drop(value, parts):
+        if isinstance(value, list):
+            for item in value:
+                drop(item, parts)
+        elif isinstance(value, dict):
+            if len(parts) == 1:
+                value.pop(parts[0], None)
+            elif parts[0] in value:
+                drop(value[parts[0]], parts[1:])
+
+    for path in paths:
+        drop(data, path.split('.'))
+    return data
+
+class PromptSection:
+    """
+    One part of a prompt. Higher priority sections are compacted last. lean_text is the section with
+    low-value fields removed (an empty string drops the section), atomic sections are dropped whole
+    rather than cut mid-way (e.g. JSON objects), and required sections are only cut once everything else is gone
+    """
+    def __init__(self, name, text, priority=1, lean_text=None, compressible=True, atomic=False, required=False):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.lean_text = lean_text
+        self.compressible = compressible
+        self.atomic = atomic
+        self.required = required
+
+class TokenBudget:
+    """
+    Fits prompt sections into max_tokens with prioritized compaction. Each stage runs only while the
+    prompt is over budget, lowest priority sections first (later sections first among equals):
+    1. drop low-value fields (lean_text)
+    2. compress text (onefilellm's stopword and whitespace compression)
+    3. truncate, or drop atomic sections
+
+    The prompt is head + the kept sections joined by separator + tail; separators between kept sections
+    count against the budget, and the reported prompt_tokens is counted on the assembled prompt.
+    """
+    def __init__(self, max_tokens):
+        self.max_tokens = max_tokens
+
+    def fit(self, sections, head="", tail="", separator=""):
+        """
+        Returns (assembled prompt, report)
+        """
+        overhead = count_tokens(head + tail) if head or tail else 0
+        separator_tokens = count_tokens(separator) if separator else 0
+        texts = [section.text for section in sections]
+        tokens = [count_tokens(text) for text in texts]
+        section_tokens = list(tokens)
+        actions = [[] for _ in sections]
+        stages = []
+        order = sorted(range(len(sections)), key=lambda i: (sections[i].required, sections[i].priority, -i))
+
+        def total():
+            kept = sum(1 for text in texts if text)
+            return overhead + sum(tokens) + separator_tokens * max(kept - 1, 0)
+
+        def excess():
+            return total() - self.max_tokens
+
+        original_tokens = total()
+
+        def replace(i, text, action):
+            texts[i] = text
+            tokens[i] = count_tokens(text) if text else 0
+            actions[i].append(action)
+
+        if excess() > 0:
+            stages.append("drop_fields")
+            for i in order:
+                if excess() <= 0:
+                    break
+                if sections[i].lean_text is not None and texts[i]:
+                    replace(i, sections[i].lean_text, "dropped_fields" if sections[i].lean_text else "dropped")
+
+        if excess() > 0:
+            stages.append("compress")
+            stop_words = get_stop_words()
+            for i in order:
+                if excess() <= 0:
+                    break
+                if sections[i].compressible and texts[i]:
+                    replace(i, compress_text(texts[i], stop_words), "compressed")
+
+        if excess() > 0:
+            stages.append("truncate")
+            for i in order:
+                over = excess()
+                if over <= 0:
+                    break
+                if not texts[i]:
+                    continue
+                keep = tokens[i] - over
+                if sections[i].atomic or keep < MIN_TRUNCATED_SECTION_TOKENS:
+                    replace(i, "", "dropped")
+                else:
+                    replace(i, truncate_tokens(texts[i], keep - count_tokens(TRUNCATION_MARKER)) + TRUNCATION_MARKER, "truncated")
+
+        prompt = head + separator.join(text for text in texts if text) + tail
+        report = {
+            "budget": self.max_tokens,
+            "original_tokens": original_tokens,
+            "prompt_tokens": count_tokens(prompt),
+            "estimated": get_encoder() is None,
+            "stages": stages,
+            "sections": {
+                section.name: {"original_tokens": section_tokens[i], "tokens": tokens[i], "actions": actions[i]}
+                for i, section in enumerate(sections) if actions[i]
+            },
+            "dropped_sections": sum(1 for i in range(len(sections)) if sections[i].text and not texts[i]),
+        }
+        return prompt, report
+
+def token_usage(response, budget_report=None):
+    """
+    Token usage Gemini reported for a response, next to the budget report of its prompt
+    """
+    usage = getattr(response, 'usage_metadata', None)
+    return {
+        "prompt_tokens": getattr(usage, 'prompt_token_count', None),
+        "response_tokens": getattr(usage, 'candidates_token_count', None),
+        "total_tokens": getattr(usage, 'total_token_count', None),
+        "budget": budget_report,
+    }
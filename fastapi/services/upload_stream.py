@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import os
+import aiofiles
+from config.settings import UPLOAD_MAX_FILE_BYTES, UPLOAD_MAX_CONNECTION_BYTES, UPLOAD_CHUNK_SIZE, UPLOAD_QUEUE_CHUNKS
+
+class UploadTooLargeError(Exception):
+    """
+    Raised when an upload exceeds its per-file or per-connection size limit
+    """
+
+class UploadStream:
+    """
+    Streams uploaded chunks to disk without holding whole files in memory.
+
+    Chunks pass through a bounded queue to an async disk writer that hashes them on the way.
+    When the disk falls behind, the queue fills up and the sender stops being read from, which
+    pushes back on fast clients through the transport instead of buffering in the worker.
+    Use one instance per connection: besides the per-file limit it enforces a limit on the total
+    bytes received over the connection.
+
+    Back-pressure and early limits only apply where chunks come straight off the socket (the WebSocket
+    uploads). HTTP multipart uploads are spooled by the framework before the route runs, so their size
+    is capped up front by UploadLimitMiddleware and UploadStream only copies the spooled file.
+    """
+    def __init__(self, max_file_bytes=UPLOAD_MAX_FILE_BYTES, max_connection_bytes=UPLOAD_MAX_CONNECTION_BYTES,
+                 queue_chunks=UPLOAD_QUEUE_CHUNKS):
+        self.max_file_bytes = max_file_bytes
+        self.max_connection_bytes = max_connection_bytes
+        self.queue_chunks = queue_chunks
+        self.received_bytes = 0
+
+    async def write(self, destination_path, chunks):
+        """
+        Write an async iterable of byte chunks to destination_path.
+        Returns (hex sha256 digest, size in bytes). On any error the partial file is removed
+        """
+        queue = asyncio.Queue(maxsize=self.queue_chunks)
+        hasher = hashlib.sha256()
+        writer = asyncio.create_task(self._write_chunks(destination_path, queue, hasher))
+        file_bytes = 0
+        try:
+            async for chunk in chunks:
+                file_bytes += len(chunk)
+                self.received_bytes += len(chunk)
+                if file_bytes > self.max_file_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {self.max_file_bytes} byte upload limit")
+                if self.received_bytes > self.max_connection_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {self.max_connection_bytes} byte connection limit")
+                await self._put(queue, chunk, writer)
+            await self._put(queue, None, writer)
+            await writer
+        except BaseException:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+            if os.path.exists(destination_path):
+                os.remove(destination_path)
+            raise
+        return hasher.hexdigest(), file_bytes
+
+    async def _put(self, queue, chunk, writer):
+        """
+        Queue a chunk for the writer, waiting while the queue is full; re-raises the writer's error if it died
+        """
+        try:
+            queue.put_nowait(chunk)
+            return
+        except asyncio.QueueFull:
+            pass
+        put = asyncio.ensure_future(queue.put(chunk))
+        await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            writer.result()
+            raise RuntimeError("Upload writer stopped before the upload finished")
+
+    async def _write_chunks(self, destination_path, queue, hasher):
+        async with aiofiles.open(destination_path, 'wb') as dest_file:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    return
+                hasher.update(chunk)
+                await dest_file.write(chunk)
+
+async def websocket_file_chunks(websocket):
+    """
+    Yield binary chunks from the socket until the client sends the b'EOF' marker
+    """
+    while True:
+        file_chunk = await websocket.receive_bytes()
+        if file_chunk == b'EOF':
+            return
+        yield file_chunk
+
+async def upload_file_chunks(file, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    Yield an UploadFile's content in chunks
+    """
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
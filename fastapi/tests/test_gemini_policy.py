@@ -0,0 +1,151 @@
+import asyncio
+import time
+import pytest
+import requests
+from google.genai import errors
+from services.gemini_policy import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GeminiCallPolicy,
+    GeminiDeadlineExceededError,
+)
+
+def api_error(code):
+    response = requests.Response()
+    response.status_code = code
+    response._content = b'{"message": "fake", "status": "FAKE"}'
+    error_class = errors.ServerError if code >= 500 else errors.ClientError
+    return error_class(code, response)
+
+class FakeCall:
+    """
+    Raises the given errors in order, then returns "ok"; records the timeout of every attempt
+    """
+    def __init__(self, *failures):
+        self.failures = list(failures)
+        self.timeouts = []
+
+    def __call__(self, timeout):
+        self.timeouts.append(timeout)
+        if self.failures:
+            raise self.failures.pop(0)
+        return "ok"
+
+    @property
+    def attempts(self):
+        return len(self.timeouts)
+
+def make_policy(failure_threshold=2, reset_seconds=60, max_attempts=3, deadline=5):
+    breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+    return GeminiCallPolicy(breaker=breaker, max_attempts=max_attempts, base_delay=0, max_delay=0, deadline=deadline)
+
+def test_breaker_opens_after_threshold_and_rejects_calls():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.get_stats()["opened"] == 1
+    assert breaker.get_stats()["rejected"] == 1
+
+def test_breaker_lets_one_probe_through_and_closes_on_success():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_retries_until_success():
+    policy = make_policy()
+    call = FakeCall(api_error(503), TimeoutError())
+    assert policy.run(call) == "ok"
+    assert call.attempts == 3
+    assert policy.stats["retries"] == 2
+    assert policy.breaker.state == "closed"
+    assert policy.breaker.failures == 0
+
+def test_attempts_are_bounded_by_the_deadline():
+    policy = make_policy(deadline=5)
+    call = FakeCall()
+    policy.run(call)
+    assert 0 < call.timeouts[0] <= 5
+
+def test_non_retryable_error_is_raised_at_once():
+    policy = make_policy()
+    call = FakeCall(api_error(400))
+    with pytest.raises(errors.ClientError):
+        policy.run(call)
+    assert call.attempts == 1
+    assert policy.breaker.failures == 0
+
+def test_failure_counts_once_per_call_after_retries():
+    policy = make_policy(failure_threshold=2, max_attempts=3)
+    call = FakeCall(*(api_error(503) for _ in range(3)))
+    with pytest.raises(errors.ServerError):
+        policy.run(call)
+    assert call.attempts == 3
+    assert policy.breaker.failures == 1
+    assert policy.breaker.state == "closed"
+
+    with pytest.raises(errors.ServerError):
+        policy.run(FakeCall(*(api_error(503) for _ in range(3))))
+    assert policy.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        policy.run(FakeCall())
+
+def test_rate_limits_do_not_open_the_breaker():
+    policy = make_policy(failure_threshold=1, max_attempts=2)
+    for _ in range(3):
+        with pytest.raises(errors.ClientError):
+            policy.run(FakeCall(api_error(429), api_error(429)))
+    assert policy.breaker.state == "closed"
+    assert policy.stats["retries"] == 3
+
+def test_deadline_exceeded_when_backoff_outlasts_it():
+    policy = make_policy(deadline=0.05)
+    policy._backoff = lambda attempt: 1
+    call = FakeCall(api_error(503))
+    with pytest.raises(GeminiDeadlineExceededError):
+        policy.run(call)
+    assert call.attempts == 1
+    assert policy.stats["deadline_exceeded"] == 1
+    assert policy.breaker.failures == 1
+
+def test_async_attempt_is_cancelled_at_the_deadline():
+    policy = make_policy(deadline=0.05)
+
+    async def slow_call(timeout):
+        await asyncio.sleep(1)
+        return "late"
+
+    with pytest.raises(GeminiDeadlineExceededError):
+        asyncio.run(policy.run_async(slow_call))
+    assert policy.breaker.failures == 1
+
+def test_async_retries_until_success():
+    policy = make_policy()
+    fake = FakeCall(api_error(502))
+
+    async def call(timeout):
+        return fake(timeout)
+
+    assert asyncio.run(policy.run_async(call)) == "ok"
+    assert fake.attempts == 2
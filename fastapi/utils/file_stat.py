@@ -0,0 +1,22 @@
+import hashlib
+import os
+
+def file_signature(path):
+    """
+    Cheap change detector for a backing file: (mtime_ns, size), or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    sha256 hex digest of a file's contents, read in chunks
+    """
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
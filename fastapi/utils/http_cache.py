@@ -0,0 +1,28 @@
+import hashlib
+import json
+from fastapi import Request, Response
+from config.settings import HTTP_CACHE_CONTROL
+
+def make_etag(*versions):
+    """
+    Strong ETag derived from the version markers of the data behind a response
+    (store signatures, file signatures, query parameters)
+    """
+    digest = hashlib.sha256(json.dumps(versions, default=str).encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+def cache_headers(etag):
+    return {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+
+def not_modified(request: Request, etag):
+    """
+    A 304 response if the request's If-None-Match already names etag, otherwise None
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses weak comparison, so a W/ prefix from an intermediary still matches
+    if "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
@@ -0,0 +1,13 @@
+from PyPDF2 import PdfReader
+
+def extract_pdf_text(file_path):
+    """
+    Extracts the text layer of a PDF. Returns (text, page_count); ("", 0) if the PDF cannot be read.
+    """
+    try:
+        reader = PdfReader(str(file_path))
+        pages = [page.extract_text() or "" for page in reader.pages]
+    except Exception as e:
+        print(f"Warning: could not extract text from {file_path}: {e}")
+        return "", 0
+    return "\n".join(pages).strip(), len(pages)
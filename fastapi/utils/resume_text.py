@@ -0,0 +1,59 @@
+def convert_resume_to_text(resume_data):
+    """
+    Flattens an analyzed resume profile into plain text for matching and indexing.
+    """
+    if resume_data is None:
+        return ""
+
+    text_parts = []
+
+    # Contact Info
+    contact_info = resume_data.get('contact_info', {})
+    text_parts.append(f"Name: {contact_info.get('full_name', 'N/A')}")
+    text_parts.append(f"Email: {contact_info.get('email', 'N/A')}")
+    text_parts.append(f"Location: {contact_info.get('location', 'N/A')}")
+
+    text_parts.append("Education:")
+    for edu in resume_data.get('education', []):
+        text_parts.append(f"- {edu.get('degree', 'N/A')} from {edu.get('institution', 'N/A')}")
+
+    text_parts.append("Work Experience:")
+    for exp in resume_data.get('work_experience', []):
+        text_parts.append(f"- {exp.get('job_title', 'N/A')} at {exp.get('company', 'N/A')}")
+        for responsibility in exp.get('responsibilities', []):
+            text_parts.append(f"  * {responsibility}")
+
+    skills = resume_data.get('skills', {})
+    technical_skills = skills.get('technical_skills', [])
+    canonical_skills = (resume_data.get('canonical_skills') or {}).get('skills')
+    if canonical_skills:
+        # Canonical names make spelling variants ("ReactJS", "React.js") share terms; raw names are kept too
+        text_parts.append("Technical Skills:")
+        text_parts.extend([
+            f"- {skill['name']}" if skill['name'] == skill['raw'] else f"- {skill['name']} ({skill['raw']})"
+            for skill in canonical_skills
+        ])
+    elif technical_skills:
+        text_parts.append("Technical Skills:")
+        text_parts.extend([f"- {skill}" for skill in technical_skills])
+
+    soft_skills = skills.get('soft_skills')
+    if soft_skills:
+        if isinstance(soft_skills, list):
+            text_parts.append("Soft Skills: " + ", ".join(soft_skills))
+        elif isinstance(soft_skills, str):
+            text_parts.append(f"Soft Skills: {soft_skills}")
+
+    certifications = skills.get('certifications', [])
+    if certifications:
+        text_parts.append("Certifications:")
+        text_parts.extend([f"- {cert}" for cert in certifications])
+
+    projects = resume_data.get('projects', [])
+    if projects:
+        text_parts.append("Projects:")
+        for project in projects:
+            text_parts.append(f"- {project.get('name', 'N/A')}")
+            text_parts.append(f"  Description: {project.get('description', 'N/A')}")
+
+    return " ".join(text_parts)
@@ -0,0 +1,15 @@
+import re
+
+def compress_text(text, stop_words=None):
+    """
+    Lossy compression for LLM prompts: collapses newlines and whitespace, strips unusual characters,
+    lowercases and, with stop_words, drops those words
+    """
+    text = re.sub(r"[\n\r]+", "\n", text)
+    # Keep apostrophes and quotation marks
+    text = re.sub(r"[^a-zA-Z0-9\s_.,!?:;@#$%^&*()+\-=[\]{}|\\<>`~'\"/]+", "", text)
+    text = re.sub(r"\s+", " ", text)
+    text = text.lower()
+    if stop_words:
+        text = " ".join(word for word in text.split() if word not in stop_words)
+    return text